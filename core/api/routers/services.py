@@ -368,7 +368,7 @@ async def scan_service_runtime(service_name: str):
     from core.inference import DependencyInferrer
     
     inferrer = DependencyInferrer()
-    result = inferrer.scan_service_runtime(service_name)
+    result = await inferrer.scan_service_runtime_async(service_name)
     
     return result
 
@@ -386,6 +386,6 @@ async def scan_all_runtime():
     from core.inference import DependencyInferrer
     
     inferrer = DependencyInferrer()
-    result = inferrer.scan_all_services_runtime()
+    result = await inferrer.scan_all_services_runtime_async()
     
     return result
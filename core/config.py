@@ -9,6 +9,11 @@ import yaml
 from typing import Dict, Optional
 from dataclasses import dataclass
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 
 @dataclass
 class ProxmoxConfig:
@@ -54,7 +59,7 @@ def load_config(config_path: str = "/var/lib/nhi/config.yaml") -> NHIConfig:
         raise FileNotFoundError(f"Config not found: {config_path}")
     
     with open(config_path, 'r') as f:
-        raw = yaml.safe_load(f)
+        raw = yaml.load(f, Loader=SafeLoader)
     
     # Parse Proxmox config
     proxmox_raw = raw.get('proxmox', {})
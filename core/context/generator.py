@@ -8,9 +8,32 @@ UPDATED v1.1: Generates dynamic .cursorrules that references JSON SSOT.
 import os
 import json
 import yaml
+import functools
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to stdlib json
+    orjson = None
+
+
+# Template lives in core/templates/, next to this package
+_TEMPLATE_PATH = Path(__file__).resolve().parent.parent / 'templates' / 'cursorrules_template.md'
+
+
+@functools.lru_cache(maxsize=4)
+def _read_template(path: Path, mtime: float) -> str:
+    """Read a template once per (path, mtime); edits on disk bust the cache."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 
 class ContextGenerator:
     """Generates AI context files from infrastructure data."""
@@ -32,48 +55,44 @@ class ContextGenerator:
     def _load_infrastructure(self) -> Dict:
         infra_path = os.path.join(self.data_path, 'infrastructure.yaml')
         if os.path.exists(infra_path):
-            with open(infra_path, 'r') as f:
-                return yaml.safe_load(f)
+            raw = Path(infra_path).read_bytes()
+            # The scanner writes this file as JSON when orjson is available
+            if orjson is not None and raw.lstrip()[:1] == b'{':
+                try:
+                    return orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    pass  # YAML flow mapping, not JSON
+            return yaml.load(raw, Loader=SafeLoader)
         return {'resources': [], 'nodes': [], 'storage': [], 'network': {}}
     
     def _load_config(self) -> Dict:
         config_path = os.path.join(self.data_path, 'config.yaml')
         if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                return yaml.safe_load(f)
+            return yaml.load(Path(config_path).read_bytes(), Loader=SafeLoader)
         return {}
     
-    def generate_cursorrules(self) -> str:
+    def generate_cursorrules(self, now: datetime = None) -> str:
         """
         Generate .cursorrules Markdown content.
         Uses the static template from core/templates/cursorrules_template.md.
         """
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-        
-        # Resolve template path
-        # Assuming current file is in core/context/generator.py
-        # Template is in core/templates/cursorrules_template.md
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(current_dir, '..', 'templates', 'cursorrules_template.md')
+        timestamp = (now or datetime.now()).strftime('%Y-%m-%d %H:%M')
         
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Simple variable substitution
-            content = content.replace('{timestamp}', timestamp)
-            return content
-            
+            content = _read_template(_TEMPLATE_PATH, os.stat(_TEMPLATE_PATH).st_mtime)
         except FileNotFoundError:
             # Fallback if template is missing (fail-safe)
-            return f"# NHI Rules (Fallback)\nGenerated: {timestamp}\n\nERROR: Template not found at {template_path}"
+            return f"# NHI Rules (Fallback)\nGenerated: {timestamp}\n\nERROR: Template not found at {_TEMPLATE_PATH}"
+        
+        # Simple variable substitution
+        return content.replace('{timestamp}', timestamp)
 
-    def generate_system_map(self) -> Dict:
+    def generate_system_map(self, now: datetime = None) -> Dict:
         config = self._load_config()
         
         system_map = {
             'version': '1.1',
-            'generated': datetime.now().isoformat(),
+            'generated': (now or datetime.now()).isoformat(),
             'proxmox': {
                 'host': config.get('proxmox', {}).get('host', 'unknown'),
                 'port': config.get('proxmox', {}).get('port', 8006)
@@ -89,18 +108,23 @@ class ContextGenerator:
     def generate(self):
         """Generate all context files."""
         os.makedirs(self.context_path, exist_ok=True)
+        now = datetime.now()
         
         # Generate .cursorrules
-        cursorrules_content = self.generate_cursorrules()
+        cursorrules_content = self.generate_cursorrules(now)
         cursorrules_path = os.path.join(self.context_path, '.cursorrules')
         with open(cursorrules_path, 'w', encoding='utf-8') as f:
             f.write(cursorrules_content)
         
         # Generate system-map.json
-        system_map = self.generate_system_map()
+        system_map = self.generate_system_map(now)
         system_map_path = os.path.join(self.context_path, 'system-map.json')
-        with open(system_map_path, 'w', encoding='utf-8') as f:
-            json.dump(system_map, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open(system_map_path, 'wb') as f:
+                f.write(orjson.dumps(system_map, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(system_map_path, 'w', encoding='utf-8') as f:
+                json.dump(system_map, f, indent=2, ensure_ascii=False)
         
         return {
             'cursorrules': cursorrules_path,
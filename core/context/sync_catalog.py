@@ -17,6 +17,8 @@ import requests
 import json
 import time
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Add core to path
 sys.path.insert(0, "/home/ai-agent/nhi-core-code")
@@ -26,6 +28,14 @@ from core.context.system_map_builder import SystemMapBuilder
 
 API_URL = "http://localhost:8000"
 
+# Keep-alive session shared by all API calls; retries transient gateway errors
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+))
+
 def log(msg):
     print(f"[{datetime.now().isoformat()}] {msg}")
 
@@ -35,7 +45,7 @@ def sync_infrastructure():
     # 1. Trigger Runtime Scan (this updates cache)
     try:
         log("  → Scanning runtime dependencies (may take 60s)...")
-        resp = requests.get(f"{API_URL}/services/scan/runtime", timeout=120)
+        resp = SESSION.get(f"{API_URL}/services/scan/runtime", timeout=120)
         if resp.status_code == 200:
             stats = resp.json().get("summary", {})
             log(f"    ✅ Runtime scan complete: {stats.get('total_connections')} connections found")
@@ -51,21 +61,31 @@ def sync_infrastructure():
         # but configured to use the fresh cache we just (hopefully) updated
         builder = SystemMapBuilder()
         catalog = builder.build_catalog() # This aggregates everything
-        output_path = builder.save_catalog()
         
         # Check for new machines (skeletons needed?)
+        # Names are already slugged by the builder. Names that slug alike
+        # would share one file: the first machine claims it, and a file left
+        # by an earlier run is never overwritten.
         rm = RegistryManager()
-        missing = rm.check_missing_registries(catalog.get("machines", []))
+        missing = {}
+        for m in catalog.get("missing_registries", []):
+            if not (rm.registry_path / f"{m['name']}.yaml").exists():
+                missing.setdefault(m['name'], m)
+        missing = list(missing.values())
         
         if missing:
             log(f"  ⚠️ Found {len(missing)} machines without registry. Creating skeletons...")
+            now = datetime.now().isoformat()  # one timestamp for the whole batch
             for m in missing:
                 # Auto-create skeleton
-                path = rm.create_skeleton(m['name'], m.get('vmid'), m.get('ip'))
+                path = rm.create_skeleton(m['name'], m.get('vmid'), m.get('ip'), now=now)
                 log(f"    + Created skeleton for {m['name']} at {path}")
             
-            # Rebuild catalog again to include new skeletons
-            builder.save_catalog()
+            # Rebuild so every derived field (compliance, summary, orphan and
+            # missing lists) reflects the new registry files
+            catalog = builder.build_catalog()
+        
+        output_path = builder.save_catalog(catalog=catalog)
             
         stats = catalog.get("summary", {})
         log(f"    ✅ Catalog updated: {stats.get('total_machines')} machines, {stats.get('total_services')} services")
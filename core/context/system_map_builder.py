@@ -9,12 +9,54 @@ Aggregates all NHI data sources into a single catalog showing:
 """
 
 import os
+import copy
 import json
 import yaml
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to stdlib json
+    orjson = None
+
+
+def _read_many(paths: List[Path]) -> Dict[Path, bytes]:
+    """
+    Read a batch of small files in a single pass.
+    
+    Paths are collected up front so directory enumeration and file reads
+    don't interleave.
+    """
+    return {path: path.read_bytes() for path in paths}
+
+
+# Parsed YAML per file, keyed on (mtime_ns, size) so unchanged files are
+# never re-parsed by a long-running process (API server, repeated syncs)
+_parsed_yaml_cache: Dict[Path, tuple] = {}
+
+
+def _load_yaml_many(paths: List[Path]) -> Dict[Path, Dict]:
+    """Parse a batch of YAML files, re-reading only those changed on disk."""
+    stale = {}
+    for path in paths:
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = _parsed_yaml_cache.get(path)
+        if cached is None or cached[0] != stamp:
+            stale[path] = stamp
+    
+    for path, raw in _read_many(list(stale)).items():
+        _parsed_yaml_cache[path] = (stale[path], yaml.load(raw, Loader=SafeLoader) or {})
+    
+    return {path: _parsed_yaml_cache[path][1] for path in paths}
+
 
 class SystemMapBuilder:
     """Builds comprehensive NHI system catalog."""
@@ -23,13 +65,54 @@ class SystemMapBuilder:
         self.data_path = Path("/var/lib/nhi")
         self.projects_root = Path("/home/ai-agent/projects")
         self.nhi_core_path = Path("/home/ai-agent/nhi-core-code")  # Dev path
+        self._catalog_cache = None
+        self._catalog_mtime = None
+        self._machines_by_vmid = {}
         
+    def _sources_mtime(self) -> tuple:
+        """
+        Fingerprint every input of build_catalog using mtimes only.
+        
+        Directory mtimes catch added/removed files, per-file mtimes catch edits.
+        """
+        def mtime(path) -> Optional[int]:
+            try:
+                return os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+        
+        def tree_mtimes(root: Path, filename: str = None) -> tuple:
+            if not root.exists():
+                return ()
+            stamps = [mtime(root)]
+            with os.scandir(root) as it:
+                for entry in it:
+                    if filename is None:
+                        stamps.append((entry.name, entry.stat().st_mtime_ns))
+                    elif entry.is_dir():
+                        stamps.append((entry.name, entry.stat().st_mtime_ns,
+                                       mtime(os.path.join(entry.path, filename))))
+            return tuple(sorted(stamps, key=str))
+        
+        return (
+            mtime(self.data_path / "infrastructure.yaml"),
+            mtime(self.nhi_core_path / "project_manifest.yaml"),
+            tree_mtimes(self.data_path / "registry" / "services"),
+            tree_mtimes(self.projects_root, "project_manifest.yaml"),
+        )
+    
     def _load_infrastructure(self) -> Dict:
         """Load infrastructure from scanner output."""
         infra_path = self.data_path / "infrastructure.yaml"
         if infra_path.exists():
-            with open(infra_path, 'r') as f:
-                return yaml.safe_load(f) or {}
+            raw = infra_path.read_bytes()
+            # The scanner writes this file as JSON when orjson is available
+            if orjson is not None and raw.lstrip()[:1] == b'{':
+                try:
+                    return orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    pass  # YAML flow mapping, not JSON
+            return yaml.load(raw, Loader=SafeLoader) or {}
         return {}
     
     def _load_registry_services(self) -> Dict[str, Dict]:
@@ -37,57 +120,61 @@ class SystemMapBuilder:
         registry_path = self.data_path / "registry" / "services"
         services = {}
         if registry_path.exists():
-            for yaml_file in registry_path.glob("*.yaml"):
-                with open(yaml_file, 'r') as f:
-                    data = yaml.safe_load(f) or {}
-                    name = data.get('name') or data.get('service', {}).get('name') or yaml_file.stem
-                    services[name] = {
-                        "data": data,
-                        "file": str(yaml_file),
-                        "is_skeleton": data.get('_status') == 'skeleton'
-                    }
+            for yaml_file, data in _load_yaml_many(list(registry_path.glob("*.yaml"))).items():
+                name = data.get('name') or data.get('service', {}).get('name') or yaml_file.stem
+                services[name] = {
+                    "data": data,
+                    "file": str(yaml_file),
+                    "is_skeleton": data.get('_status') == 'skeleton'
+                }
         return services
     
     def _load_projects(self) -> Dict[str, Dict]:
         """Load all project manifests."""
         projects = {}
+        manifests = {}  # manifest path -> project name, read in one batch below
         
         # Add NHI-CORE as system project
         nhi_core_manifest = self.nhi_core_path / "project_manifest.yaml"
         if nhi_core_manifest.exists():
-            with open(nhi_core_manifest, 'r') as f:
-                data = yaml.safe_load(f) or {}
             projects["nhi-core"] = {
-                "data": data,
+                "data": {},
                 "path": str(self.nhi_core_path),
                 "manifest_file": str(nhi_core_manifest),
                 "docs_path": str(self.nhi_core_path / "docs"),
                 "is_system": True
             }
+            manifests[nhi_core_manifest] = "nhi-core"
         
-        # Add user projects
+        # Add user projects (scandir: type info comes with the directory listing)
         if self.projects_root.exists():
-            for item in self.projects_root.iterdir():
-                if item.is_dir() and not item.name.startswith('.'):
+            with os.scandir(self.projects_root) as it:
+                for entry in it:
+                    if entry.name.startswith('.') or not entry.is_dir():
+                        continue
+                    
+                    item = Path(entry.path)
                     manifest_path = item / "project_manifest.yaml"
                     docs_path = item / "docs"
+                    has_manifest = manifest_path.is_file()
+                    has_docs = docs_path.exists()
                     
-                    project_data = {
-                        "path": str(item),
-                        "has_manifest": manifest_path.exists(),
-                        "has_docs": docs_path.exists(),
-                        "manifest_file": str(manifest_path) if manifest_path.exists() else None,
-                        "docs_path": str(docs_path) if docs_path.exists() else None,
-                        "is_system": False
+                    projects[entry.name] = {
+                        "path": entry.path,
+                        "has_manifest": has_manifest,
+                        "has_docs": has_docs,
+                        "manifest_file": str(manifest_path) if has_manifest else None,
+                        "docs_path": str(docs_path) if has_docs else None,
+                        "is_system": False,
+                        "data": {}
                     }
                     
-                    if manifest_path.exists():
-                        with open(manifest_path, 'r') as f:
-                            project_data["data"] = yaml.safe_load(f) or {}
-                    else:
-                        project_data["data"] = {}
-                    
-                    projects[item.name] = project_data
+                    if has_manifest:
+                        manifests[manifest_path] = entry.name
+        
+        # Read the system and user manifests in one batch once the walk is done
+        for manifest_path, data in _load_yaml_many(list(manifests)).items():
+            projects[manifests[manifest_path]]["data"] = data
         
         return projects
     
@@ -127,9 +214,17 @@ class SystemMapBuilder:
         """
         Build comprehensive system catalog.
         
+        The result is cached and reused until one of the source files changes.
+        Every call returns its own deep copy with a current 'generated'
+        timestamp, so callers may modify it without touching the cache.
+        
         Returns:
             Dict with machines, services, projects, and their associations
         """
+        sources_mtime = self._sources_mtime()
+        if self._catalog_cache is not None and sources_mtime == self._catalog_mtime:
+            return self._copy_cached_catalog()
+        
         infrastructure = self._load_infrastructure()
         registry_services = self._load_registry_services()
         projects = self._load_projects()
@@ -146,6 +241,7 @@ class SystemMapBuilder:
             },
             "machines": [],
             "orphan_registry": [],  # Registry entries without matching machine
+            "missing_registries": [],  # Machines without a registry entry
             "orphan_projects": []   # Projects without registry linkage
         }
         
@@ -153,9 +249,27 @@ class SystemMapBuilder:
         resources = infrastructure.get("resources", [])
         machines_by_vmid = {}
         
+        # Lookup indexes so each machine resolves its registry entry and
+        # hosted projects without rescanning every service/project
+        svc_by_vmid = {}
+        svc_by_lower_name = {}
+        for svc_name, svc_data in registry_services.items():
+            svc_vmid = svc_data["data"].get("vmid")
+            if svc_vmid is not None:
+                svc_by_vmid.setdefault(svc_vmid, svc_name)
+            svc_by_lower_name.setdefault(svc_name.lower(), svc_name)
+        
+        projects_by_vmid = {}
+        for proj_name, proj_data in projects.items():
+            reg = proj_data.get("data", {}).get("registration", {})
+            projects_by_vmid.setdefault(reg.get("vmid"), []).append(proj_name)
+        
+        compliance_pending = []  # (machine, registry data), checked after the loop
+        
         for resource in resources:
             vmid = resource.get("vmid")
             name = resource.get("name")
+            lower_name = (name or "").lower()
             
             machine = {
                 "vmid": vmid,
@@ -181,30 +295,44 @@ class SystemMapBuilder:
                 "linked_projects": []
             }
             
-            # Try to find matching registry entry
-            for svc_name, svc_data in registry_services.items():
-                svc_vmid = svc_data["data"].get("vmid")
-                if svc_vmid == vmid or svc_name.lower() in name.lower():
-                    machine["files"]["registry"] = svc_data["file"]
-                    machine["dependencies"]["required"] = svc_data["data"].get("dependencies", {}).get("required", [])
-                    machine["dependencies"]["optional"] = svc_data["data"].get("dependencies", {}).get("optional", [])
-                    machine["compliance"] = self._check_compliance("service", svc_data["data"])
-                    if svc_data["is_skeleton"]:
-                        catalog["summary"]["skeletons_pending"] += 1
-                    registry_services[svc_name]["matched"] = True
-                    break
+            # Try to find matching registry entry: by vmid, then exact name,
+            # then fall back to a partial name match (e.g. "redis" -> "redis-cache")
+            svc_name = svc_by_vmid.get(vmid) or svc_by_lower_name.get(lower_name)
+            if svc_name is None:
+                svc_name = next(
+                    (svc for lower_svc, svc in svc_by_lower_name.items() if lower_svc in lower_name),
+                    None
+                )
+            if svc_name is not None:
+                svc_data = registry_services[svc_name]
+                machine["files"]["registry"] = svc_data["file"]
+                machine["dependencies"]["required"] = svc_data["data"].get("dependencies", {}).get("required", [])
+                machine["dependencies"]["optional"] = svc_data["data"].get("dependencies", {}).get("optional", [])
+                compliance_pending.append((machine, svc_data["data"]))
+                if svc_data["is_skeleton"]:
+                    catalog["summary"]["skeletons_pending"] += 1
+                svc_data["matched"] = True
+            elif name:  # a nameless machine has no slug to create a skeleton under
+                catalog["missing_registries"].append({
+                    # Skeleton file slug, reusing the name lowered for matching
+                    "name": lower_name.replace(' ', '-'),
+                    "vmid": vmid,
+                    "ip": resource.get("ip")
+                })
             
             # Check if any project is hosted on this machine
-            for proj_name, proj_data in projects.items():
-                reg = proj_data.get("data", {}).get("registration", {})
-                if reg.get("vmid") == vmid:
-                    machine["linked_projects"].append(proj_name)
-                    machine["files"]["manifest"] = proj_data.get("manifest_file")
-                    machine["files"]["docs"] = proj_data.get("docs_path")
+            for proj_name in projects_by_vmid.get(vmid, []):
+                proj_data = projects[proj_name]
+                machine["linked_projects"].append(proj_name)
+                machine["files"]["manifest"] = proj_data.get("manifest_file")
+                machine["files"]["docs"] = proj_data.get("docs_path")
             
             machines_by_vmid[vmid] = machine
             catalog["machines"].append(machine)
         
+        for machine, data in compliance_pending:
+            machine["compliance"] = self._check_compliance("service", data)
+        
         # Find orphan registry entries (not matched to any machine)
         for svc_name, svc_data in registry_services.items():
             if not svc_data.get("matched"):
@@ -214,13 +342,18 @@ class SystemMapBuilder:
                     "declared_vmid": svc_data["data"].get("vmid")
                 })
         
-        # Find projects that consume services and update consumer lists
+        # Find projects that consume services and update consumer lists.
+        # Machine names are lowered once; a dependency may match several machines.
+        machines_by_lower_name = [
+            ((machine["name"] or "").lower(), machine) for machine in catalog["machines"]
+        ]
         for proj_name, proj_data in projects.items():
             deps = proj_data.get("data", {}).get("dependencies", {}).get("services", [])
             for dep in deps:
+                lower_dep = dep.lower()
                 # Find which machine provides this service
-                for machine in catalog["machines"]:
-                    if dep.lower() in machine["name"].lower():
+                for lower_name, machine in machines_by_lower_name:
+                    if lower_dep in lower_name:
                         machine["dependencies"]["consumers"].append(proj_name)
         
         # Calculate summary
@@ -233,23 +366,46 @@ class SystemMapBuilder:
             if machine.get("compliance") and not machine["compliance"]["compliant"]:
                 catalog["summary"]["compliance_issues"] += 1
         
+        self._catalog_cache = catalog
+        self._catalog_mtime = sources_mtime
+        self._machines_by_vmid = machines_by_vmid
+        
+        return self._copy_cached_catalog()
+    
+    def _copy_cached_catalog(self) -> Dict:
+        """Deep copy of the cached catalog, stamped with the current time."""
+        catalog = copy.deepcopy(self._catalog_cache)
+        catalog["generated"] = datetime.now().isoformat()
         return catalog
     
-    def save_catalog(self, output_path: str = None) -> str:
-        """Build and save the system catalog."""
-        catalog = self.build_catalog()
+    def save_catalog(self, output_path: str = None, *, catalog: Dict = None) -> str:
+        """
+        Save the system catalog.
+        
+        Args:
+            output_path: Destination (default: <data>/context/system-catalog.json)
+            catalog: Prebuilt catalog to write (default: build_catalog())
+        """
+        if catalog is None:
+            catalog = self.build_catalog()
         
         output_path = output_path or str(self.data_path / "context" / "system-catalog.json")
         
-        with open(output_path, 'w') as f:
-            json.dump(catalog, f, indent=2, ensure_ascii=False)
+        # Serialize fully in memory, then hand the kernel one buffer to write.
+        # Sorted keys keep the file byte-stable for unchanged content.
+        if orjson is not None:
+            payload = orjson.dumps(
+                catalog,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+            )
+        else:
+            payload = json.dumps(catalog, indent=2, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        Path(output_path).write_bytes(payload)
         
         return output_path
     
     def get_machine_summary(self, vmid: int) -> Optional[Dict]:
         """Get a summary of a specific machine and all its associations."""
-        catalog = self.build_catalog()
-        for machine in catalog["machines"]:
-            if machine["vmid"] == vmid:
-                return machine
-        return None
+        self.build_catalog()
+        machine = self._machines_by_vmid.get(vmid)
+        return copy.deepcopy(machine) if machine is not None else None
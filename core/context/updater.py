@@ -61,6 +61,16 @@ def run_update():
         raise
 
 
+# Stage, commit and push in one process; exits 3 when there is nothing to commit.
+# The commit message is passed as $1 so it never needs shell quoting.
+PUSH_SCRIPT = (
+    'git add -A && '
+    '{ git diff --cached --quiet && exit 3; '
+    'git commit -q -m "$1" && git push -q; }'
+)
+NOTHING_TO_COMMIT = 3
+
+
 def push_changes():
     """Commit and push to GitHub if there are changes."""
     data_path = "/var/lib/nhi"
@@ -70,37 +80,20 @@ def push_changes():
         logger.info("No git repository in data path, skipping push")
         return
     
-    try:
-        # Check for changes
-        result = subprocess.run(
-            ['git', 'status', '--porcelain'],
-            cwd=data_path,
-            capture_output=True,
-            text=True
-        )
-        
-        if not result.stdout.strip():
-            logger.info("No changes to commit")
-            return
-        
-        # Add all changes
-        subprocess.run(['git', 'add', '-A'], cwd=data_path, check=True)
-        
-        # Commit
-        commit_msg = f"[NHI-CORE] Auto-update {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-        subprocess.run(
-            ['git', 'commit', '-m', commit_msg],
-            cwd=data_path,
-            check=True
-        )
-        
-        # Push
-        subprocess.run(['git', 'push'], cwd=data_path, check=True)
-        
+    commit_msg = f"[NHI-CORE] Auto-update {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    result = subprocess.run(
+        ['bash', '-c', PUSH_SCRIPT, 'nhi-push', commit_msg],
+        cwd=data_path,
+        capture_output=True,
+        text=True
+    )
+    
+    if result.returncode == NOTHING_TO_COMMIT:
+        logger.info("No changes to commit")
+    elif result.returncode != 0:
+        logger.error(f"Git operation failed (exit {result.returncode}): {result.stderr.strip()}")
+    else:
         logger.info("Changes pushed to GitHub")
-        
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Git operation failed: {e}")
 
 
 if __name__ == '__main__':
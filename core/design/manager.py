@@ -9,9 +9,15 @@ import yaml
 import json
 import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
 class DesignSystemManager:
@@ -20,6 +26,14 @@ class DesignSystemManager:
     Handles personality loading and configuration generation.
     """
     
+    TAILWIND_CONFIG_TEMPLATE = """/** @type {{import('tailwindcss').Config}} */
+module.exports = {{
+  content: ['./src/**/*.{{html,js,svelte,ts}}'],
+  theme: {theme},
+  plugins: [],
+}}
+"""
+    
     def __init__(self, core_path: str = "/opt/nhi-core"):
         self.core_path = Path(core_path)
         self.design_path = self.core_path / "core" / "design"
@@ -28,23 +42,31 @@ class DesignSystemManager:
     
     def list_personalities(self) -> List[Dict]:
         """List available design personalities."""
-        personalities = []
-        
         if not self.personalities_path.exists():
             return []
-            
-        for p_dir in self.personalities_path.iterdir():
-            if p_dir.is_dir():
-                manifest = p_dir / "manifest.yaml"
-                if manifest.exists():
-                    try:
-                        with open(manifest, 'r') as f:
-                            data = yaml.safe_load(f)
-                            personalities.append(data.get('meta', {}))
-                    except Exception as e:
-                        logger.warning(f"Failed to load personality {p_dir.name}: {e}")
-                        
-        return personalities
+        
+        manifests = [
+            p_dir / "manifest.yaml"
+            for p_dir in self.personalities_path.iterdir()
+            if p_dir.is_dir() and (p_dir / "manifest.yaml").exists()
+        ]
+        if not manifests:
+            return []
+        
+        # Manifests are independent; load them concurrently (order is preserved)
+        with ThreadPoolExecutor(max_workers=min(8, len(manifests))) as executor:
+            metas = list(executor.map(self._load_manifest_meta, manifests))
+        
+        return [meta for meta in metas if meta is not None]
+
+    def _load_manifest_meta(self, manifest: Path) -> Optional[Dict]:
+        """Load the 'meta' section of a personality manifest (None on failure)."""
+        try:
+            data = yaml.load(manifest.read_bytes(), Loader=SafeLoader)
+            return data.get('meta', {})
+        except Exception as e:
+            logger.warning(f"Failed to load personality {manifest.parent.name}: {e}")
+            return None
 
     def get_personality(self, personality_id: str) -> Dict:
         """Get full definition of a personality."""
@@ -52,15 +74,13 @@ class DesignSystemManager:
         if not manifest.exists():
             raise ValueError(f"Personality '{personality_id}' not found")
             
-        with open(manifest, 'r') as f:
-            return yaml.safe_load(f)
+        return yaml.load(manifest.read_bytes(), Loader=SafeLoader)
 
     def get_core_tokens(self) -> Dict:
         """Load core universal tokens."""
         if not self.core_tokens_path.exists():
             return {}
-        with open(self.core_tokens_path, 'r') as f:
-            return yaml.safe_load(f)
+        return yaml.load(self.core_tokens_path.read_bytes(), Loader=SafeLoader)
 
     def generate_tailwind_config(self, personality_id: str, output_path: str) -> None:
         """
@@ -70,64 +90,57 @@ class DesignSystemManager:
         personality = self.get_personality(personality_id)
         core_tokens = self.get_core_tokens()
         
-        # Prepare the JS content logic
-        # In a real implementation, we would deeply merge dictionaries.
-        # Here we generate a simplistic mapping for the specific personality.
-        
         colors = personality.get('colors', {})
+        colors_base = colors.get('base', {})
+        colors_text = colors.get('text', {})
+        colors_accent = colors.get('accent', {})
         fonts = personality.get('typography', {})
+        effects = personality.get('effects', {})
         
-        config_content = f"""/** @type {{import('tailwindcss').Config}} */
-module.exports = {{
-  content: ['./src/**/*.{{html,js,svelte,ts}}'],
-  theme: {{
-    extend: {{
-      colors: {{
-        // Base
-        background: '{colors.get('base', {}).get('background')}',
-        surface: '{colors.get('base', {}).get('surface')}',
-        border: '{colors.get('base', {}).get('border')}',
+        font_family = fonts.get('font-family', 'sans-serif')
         
-        // Text
-        'text-primary': '{colors.get('text', {}).get('primary')}',
-        'text-secondary': '{colors.get('text', {}).get('secondary')}',
+        # JSON is a valid JS object literal, and json.dumps quotes/escapes
+        # every value for us
+        theme = {
+            "extend": {
+                "colors": {
+                    "background": colors_base.get('background'),
+                    "surface": colors_base.get('surface'),
+                    "border": colors_base.get('border'),
+                    "text-primary": colors_text.get('primary'),
+                    "text-secondary": colors_text.get('secondary'),
+                    "primary": colors_accent.get('primary'),
+                    "secondary": colors_accent.get('secondary', ''),
+                },
+                "fontFamily": {
+                    "sans": self._font_stack(font_family),
+                    "display": self._font_stack(fonts.get('display-font', font_family)),
+                },
+                "boxShadow": effects.get('shadows', {}),
+                "borderRadius": {
+                    k.removeprefix('radius-'): v
+                    for k, v in effects.get('borders', {}).items() if k.startswith('radius-')
+                },
+            },
+            "spacing": core_tokens.get('spacing', {}).get('scale', {}),
+            "screens": core_tokens.get('breakpoints', {}),
+        }
         
-        // Brand
-        primary: '{colors.get('accent', {}).get('primary')}',
-        secondary: '{colors.get('accent', {}).get('secondary', '')}',
-      }},
-      fontFamily: {{
-        sans: [{fonts.get('font-family', 'sans-serif')}],
-        display: [{fonts.get('display-font', fonts.get('font-family', 'sans-serif'))}],
-      }},
-      boxShadow: {{
-        // Personality specific shadows
-        {''.join([f"'{k}': '{v}'," for k,v in personality.get('effects', {}).get('shadows', {}).items()])}
-      }},
-      borderRadius: {{
-         // Personality specific radius
-         {''.join([f"'{k.replace('radius-', '')}': '{v}'," for k,v in personality.get('effects', {}).get('borders', {}).items() if 'radius-' in k])}
-      }}
-    }},
-    // Core Spacing (Injected from Core)
-    spacing: {{
-      {','.join([f"'{k}': '{v}'" for k,v in core_tokens.get('spacing', {}).get('scale', {}).items()])}
-    }},
-    screens: {{
-      {','.join([f"'{k}': '{v}'" for k,v in core_tokens.get('breakpoints', {}).items()])}
-    }}
-  }},
-  plugins: [],
-}}
-"""
+        config_content = self.TAILWIND_CONFIG_TEMPLATE.format(
+            theme=json.dumps(theme, indent=2).replace('\n', '\n  ')
+        )
         
         output = Path(output_path)
         output.parent.mkdir(parents=True, exist_ok=True)
-        with open(output, 'w') as f:
-            f.write(config_content)
+        output.write_text(config_content)
             
         logger.info(f"Generated tailwind.config.js for {personality_id} at {output_path}")
 
+    @staticmethod
+    def _font_stack(font_family: str) -> List[str]:
+        """Split a CSS font-family string ("'Inter', sans-serif") into a list."""
+        return [font.strip().strip('\'"') for font in font_family.split(',') if font.strip()]
+
 if __name__ == "__main__":
     # Test
     mgr = DesignSystemManager()
@@ -9,12 +9,123 @@ Automatically discovers service dependencies by:
 
 import os
 import re
+import asyncio
+import json
+import mmap
+import fnmatch
+import functools
 import socket
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+try:
+    import re2
+except ImportError:  # optional: linear-time regex engine, falls back to re
+    re2 = None
+
+
+def _compile_pattern(pattern: bytes):
+    """Compile a case-insensitive pattern, preferring google-re2 when installed."""
+    if re2 is not None:
+        options = re2.Options()
+        options.case_sensitive = False
+        try:
+            return re2.compile(pattern, options)
+        except re2.error:
+            pass  # Syntax re2 doesn't support: use the backtracking engine
+    return re.compile(pattern, re.IGNORECASE)
+
+
+PROC_NET_TCP_FILES = ("/proc/net/tcp", "/proc/net/tcp6")
+
+# Socket states as printed in /proc/net/tcp (see include/net/tcp_states.h)
+TCP_ESTABLISHED = "01"
+TCP_LISTEN = "0A"
+
+
+def _read_proc_net_tcp() -> str:
+    """Concatenate the local TCP socket tables (tcp6 may be absent)."""
+    chunks = []
+    for path in PROC_NET_TCP_FILES:
+        try:
+            with open(path) as f:
+                chunks.append(f.read())
+        except OSError:
+            pass
+    return ''.join(chunks)
+
+
+@functools.lru_cache(maxsize=4096)
+def _hex_to_ip(hex_ip: str) -> str:
+    """
+    Convert a /proc/net/tcp{,6} hex address to its printable form.
+    
+    The address is hex in host byte order, one 32-bit word at a time
+    (little-endian on the x86 hosts we run on). IPv4-mapped IPv6 addresses
+    are returned in dotted form so they match the IPs in the system map.
+    Cached: the same few peers recur on nearly every line.
+    """
+    raw = bytes.fromhex(hex_ip)
+    if len(raw) == 4:
+        return socket.inet_ntoa(raw[::-1])
+    raw = b''.join(raw[i:i + 4][::-1] for i in range(0, 16, 4))
+    ip = socket.inet_ntop(socket.AF_INET6, raw)
+    if ip.startswith('::ffff:') and '.' in ip:
+        ip = ip[7:]
+    return ip
+
+
+def _decode_proc_address(field: str) -> Tuple[str, int]:
+    """Decode an 'ADDR:PORT' field from /proc/net/tcp{,6}; the port is plain hex."""
+    hex_ip, hex_port = field.split(':')
+    return _hex_to_ip(hex_ip), int(hex_port, 16)
+
+
+def _parse_proc_net_tcp(output: str):
+    """Yield (state, (local_ip, local_port), (peer_ip, peer_port)) per socket."""
+    for line in output.splitlines():
+        cols = line.split()
+        # Skip the "sl local_address rem_address st ..." header lines
+        if len(cols) < 4 or not cols[0].endswith(':'):
+            continue
+        try:
+            local = _decode_proc_address(cols[1])
+            peer = _decode_proc_address(cols[2])
+        except ValueError:
+            continue
+        yield cols[3], local, peer
+
+
+@functools.cache
+def _detect_local_ip() -> str:
+    """IP this machine uses for outbound connections (probed once per process)."""
+    try:
+        # connect() on a UDP socket only picks a route; nothing is sent
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+
+
+SYSTEM_MAP_PATH = Path("/var/lib/nhi/context/system-map.json")
+
+
+@functools.lru_cache(maxsize=4)
+def _read_system_map(path: str, mtime_ns: int) -> Dict:
+    """Parse system-map.json once per (path, mtime); callers must not mutate it."""
+    with open(path) as f:
+        return json.load(f)
+
 
 class DependencyInferrer:
     """Infers service dependencies from runtime and config analysis."""
@@ -42,47 +153,94 @@ class DependencyInferrer:
         "config.*",
         "docker-compose*.yml"
     ]
+    _CONFIG_FILE_RE = re.compile('|'.join(fnmatch.translate(p) for p in CONFIG_PATTERNS))
+    
+    # Connection configs are small; anything bigger is a data dump, not config
+    MAX_CONFIG_SIZE = 1_000_000
+    
+    # Directories never searched for config files ('.venv' was already
+    # skipped by the old substring match on 'venv')
+    SKIP_DIRS = frozenset({'node_modules', '.git', '__pycache__', 'venv', '.venv'})
     
-    # Regex patterns for connection strings
+    # Regex patterns for connection strings (bytes: files are scanned undecoded)
     CONNECTION_PATTERNS = [
         # PostgreSQL
-        r'postgres(?:ql)?://[^@]+@([^:/]+):?(\d+)?',
-        r'POSTGRES_HOST\s*[=:]\s*["\']?([^"\'\s]+)',
-        r'DATABASE_URL.*@([^:/]+):(\d+)',
+        rb'postgres(?:ql)?://[^@]+@([^:/]+):?(\d+)?',
+        rb'POSTGRES_HOST\s*[=:]\s*["\']?([^"\'\s]+)',
+        rb'DATABASE_URL.*@([^:/]+):(\d+)',
         # Redis
-        r'redis://([^:/]+):?(\d+)?',
-        r'REDIS_HOST\s*[=:]\s*["\']?([^"\'\s]+)',
+        rb'redis://([^:/]+):?(\d+)?',
+        rb'REDIS_HOST\s*[=:]\s*["\']?([^"\'\s]+)',
         # Generic host:port
-        r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d+)',
+        rb'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d+)',
     ]
     
+    # Compiled once at class load. Each pattern gets its own pass: a single
+    # alternation would only return non-overlapping matches, so e.g. the
+    # ip:port rule could not see a port inside a POSTGRES_HOST value.
+    _COMPILED_PATTERNS = [_compile_pattern(p) for p in CONNECTION_PATTERNS]
+    
+    # Prescreen: every pattern above needs one of these literals (any case),
+    # except host:port which needs a dotted quad followed by ':'
+    PRESCREEN_KEYWORDS = (b'postgres', b'redis', b'database_url')
+    _PRESCREEN_PATTERN = re.compile(
+        b'|'.join(PRESCREEN_KEYWORDS + (rb'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d',)),
+        re.IGNORECASE
+    )
+
+    # Concurrent runtime scans; below sshd's default MaxStartups (10)
+    MAX_CONCURRENT_SCANS = 8
+    
+    # Raw kernel socket tables; parsed locally instead of scraping `ss` output.
+    # Only the IPv4 table is required: hosts booted without IPv6 have no tcp6,
+    # which must not turn the exit status (and so the scan) into a failure.
+    PROC_NET_TCP_CMD = (
+        f"cat {PROC_NET_TCP_FILES[0]} && "
+        f"{{ cat {' '.join(PROC_NET_TCP_FILES[1:])} 2>/dev/null; true; }}"
+    )
+    
+    # ssh options for every call: multiplex over one ControlMaster per host
+    _SSH_MUX_OPTS = (
+        "-o", "ControlMaster=auto",
+        "-o", "ControlPath=~/.ssh/nhi-cm-%C",
+        "-o", "ControlPersist=60s",
+    )
+    # Extra options for runtime scans: fail fast, never prompt
+    _SSH_SCAN_OPTS = (
+        "-o", "ConnectTimeout=5",
+        "-o", "StrictHostKeyChecking=no",
+        "-o", "BatchMode=yes",
+    )
+
     def __init__(self):
-        self.system_map = self._load_system_map()
-        self.ip_to_service = self._build_ip_mapping()
-        self._local_ip = None
+        self._ip_to_service = None
+        self._ip_map_source = None
+    
+    @property
+    def system_map(self) -> Dict:
+        """System map, loaded on first access and reloaded when the file changes."""
+        return self._load_system_map()
+    
+    @property
+    def ip_to_service(self) -> Dict[str, str]:
+        """IP → service mapping, rebuilt only when the system map changes."""
+        system_map = self.system_map
+        if self._ip_map_source is not system_map:
+            self._ip_to_service = self._build_ip_mapping()
+            self._ip_map_source = system_map
+        return self._ip_to_service
     
     def _get_local_ip(self) -> str:
         """Get this machine's IP address."""
-        if self._local_ip:
-            return self._local_ip
-        try:
-            # Get the IP used for outbound connections
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            self._local_ip = s.getsockname()[0]
-            s.close()
-        except:
-            self._local_ip = "127.0.0.1"
-        return self._local_ip
+        return _detect_local_ip()
     
     def _load_system_map(self) -> Dict:
         """Load system map for IP→service mapping."""
-        path = Path("/var/lib/nhi/context/system-map.json")
-        if path.exists():
-            import json
-            with open(path) as f:
-                return json.load(f)
-        return {"resources": []}
+        try:
+            mtime_ns = os.stat(SYSTEM_MAP_PATH).st_mtime_ns
+        except FileNotFoundError:
+            return {"resources": []}
+        return _read_system_map(str(SYSTEM_MAP_PATH), mtime_ns)
     
     def _build_ip_mapping(self) -> Dict[str, str]:
         """Build IP → service name mapping."""
@@ -109,43 +267,37 @@ class DependencyInferrer:
         found_ports: Set[int] = set()
         inferred: Set[str] = set()
         
-        # Search config files
-        for pattern in self.CONFIG_PATTERNS:
-            for config_file in project.rglob(pattern):
-                # Skip node_modules, .git, etc.
-                if any(skip in str(config_file) for skip in [
-                    'node_modules', '.git', '__pycache__', 'venv'
-                ]):
+        # Search config files: one walk, each file tested against all patterns
+        for root, dirs, files in os.walk(project):
+            # Prune node_modules, .git, etc. so the walk never descends into them
+            dirs[:] = [d for d in dirs if d not in self.SKIP_DIRS]
+            
+            for filename in files:
+                if not self._CONFIG_FILE_RE.match(filename):
                     continue
+                config_file = os.path.join(root, filename)
                 
                 try:
-                    content = config_file.read_text(errors='ignore')
+                    st = os.stat(config_file)
+                except OSError:
+                    continue
+                if st.st_size > self.MAX_CONFIG_SIZE:
+                    continue
+                
+                # Findings are cached per (file, mtime, size): unchanged files
+                # are not re-read when projects are inferred again
+                for host, port in _scan_config_file(config_file, st.st_mtime_ns, st.st_size):
+                    if host:
+                        found_hosts.add(host)
+                        # Check if IP maps to known service
+                        if host in self.ip_to_service:
+                            inferred.add(self.ip_to_service[host])
                     
-                    # Apply regex patterns
-                    for pattern_re in self.CONNECTION_PATTERNS:
-                        matches = re.findall(pattern_re, content, re.IGNORECASE)
-                        for match in matches:
-                            if isinstance(match, tuple):
-                                host = match[0] if match[0] else None
-                                port = int(match[1]) if len(match) > 1 and match[1] else None
-                            else:
-                                host = match
-                                port = None
-                            
-                            if host:
-                                found_hosts.add(host)
-                                # Check if IP maps to known service
-                                if host in self.ip_to_service:
-                                    inferred.add(self.ip_to_service[host])
-                            
-                            if port:
-                                found_ports.add(port)
-                                # Check if port maps to known service
-                                if port in self.KNOWN_PORTS:
-                                    inferred.add(self.KNOWN_PORTS[port])
-                                    
-                except Exception:
-                    pass
+                    if port:
+                        found_ports.add(port)
+                        # Check if port maps to known service
+                        if port in self.KNOWN_PORTS:
+                            inferred.add(self.KNOWN_PORTS[port])
         
         return {
             "found_hosts": list(found_hosts),
@@ -154,6 +306,30 @@ class DependencyInferrer:
             "confidence": "medium" if inferred else "low"
         }
     
+    @classmethod
+    def _may_contain_connection(cls, content) -> bool:
+        """Cheap literal check that rules out files no pattern can match."""
+        return cls._PRESCREEN_PATTERN.search(content) is not None
+    
+    @staticmethod
+    def _match_host_port(match) -> tuple:
+        """Extract (host, port) from a match of one CONNECTION_PATTERNS entry."""
+        groups = match.groups()
+        host = groups[0]
+        port = groups[1] if len(groups) > 1 else None
+        # Only the captured groups are decoded, never the whole file
+        host = host.decode('utf-8', errors='ignore') if host else None
+        return host, int(port) if port else None
+    
+    def _ssh_args(self, ip: str, command: str, *options: str) -> List[str]:
+        """
+        Build an ssh command line that multiplexes over a shared connection.
+        
+        The first call to a host starts a ControlMaster that stays up for 60s;
+        later calls reuse it and skip the TCP handshake and authentication.
+        """
+        return ["ssh", *self._SSH_MUX_OPTS, *options, f"ai-agent@{ip}", command]
+    
     def infer_from_ports(self, service_ip: str) -> Dict[str, List[str]]:
         """
         Check which ports a service is connecting TO (outbound).
@@ -165,7 +341,7 @@ class DependencyInferrer:
         try:
             # Use ss to get established connections
             result = subprocess.run(
-                ["ssh", f"ai-agent@{service_ip}", "ss -tn state established"],
+                self._ssh_args(service_ip, "ss -tn state established"),
                 capture_output=True,
                 text=True,
                 timeout=10
@@ -220,8 +396,7 @@ class DependencyInferrer:
         manifest_path = project_path / "project_manifest.yaml"
         declared_deps = []
         if manifest_path.exists():
-            with open(manifest_path) as f:
-                manifest = yaml.safe_load(f) or {}
+            manifest = yaml.load(manifest_path.read_bytes(), Loader=SafeLoader) or {}
             declared_deps = manifest.get("dependencies", {}).get("services", [])
         
         # Combine all inferred
@@ -242,32 +417,43 @@ class DependencyInferrer:
     
     def infer_all_projects(self) -> List[Dict]:
         """Run inference on all projects."""
-        results = []
         projects_root = Path("/home/ai-agent/projects")
         
-        for project_dir in projects_root.iterdir():
-            if project_dir.is_dir() and not project_dir.name.startswith('.'):
-                result = self.infer_for_project(project_dir.name)
-                results.append(result)
+        # DirEntry.is_dir() uses the type from the directory read, no stat per child
+        with os.scandir(projects_root) as entries:
+            names = [
+                entry.name for entry in entries
+                if entry.is_dir() and not entry.name.startswith('.')
+            ]
+        if not names:
+            return []
         
-        return results
+        # Projects are independent and I/O bound: infer them concurrently
+        with ThreadPoolExecutor(max_workers=min(32, len(names))) as executor:
+            return list(executor.map(self.infer_for_project, names))
     
-    def scan_service_runtime(self, service_name: str) -> Dict:
-        """
-        Scan a specific service's runtime connections via SSH.
-        
-        Returns detailed connection info including:
-        - Outbound connections (what this service connects TO)
-        - Listening ports (what ports this service exposes)
-        - Inferred dependencies
-        """
-        # Find service IP from system map
-        service_ip = None
+    def _find_service_ip(self, service_name: str) -> Optional[str]:
+        """Find a service's IP in the system map (partial name match)."""
         for resource in self.system_map.get("resources", []):
             name = resource.get("name", "").lower()
             if service_name.lower() in name or name in service_name.lower():
-                service_ip = resource.get("ip")
-                break
+                return resource.get("ip")
+        return None
+    
+    def _is_local(self, service_name: str, service_ip: str) -> bool:
+        """True if the service runs on this machine (scanned without SSH)."""
+        return service_ip == self._get_local_ip() or service_name.lower() in ["nhi-core", "nhi-core-v1.1"]
+    
+    async def _scan_host_services(self, names: List[str], semaphore: asyncio.Semaphore) -> Dict[str, Dict]:
+        """Scan a host once and report the result for every service on it."""
+        async with semaphore:
+            first = await self.scan_service_runtime_async(names[0])
+        return {name: first if name == names[0] else dict(first, service=name) for name in names}
+    
+    def _new_runtime_result(self, service_name: str) -> Dict:
+        """Resolve a service and build its empty scan result ('failed' if no IP)."""
+        # Find service IP from system map
+        service_ip = self._find_service_ip(service_name)
         
         if not service_ip:
             return {
@@ -277,10 +463,9 @@ class DependencyInferrer:
             }
         
         # Check if this is the local machine
-        local_ip = self._get_local_ip()
-        is_local = (service_ip == local_ip) or service_name.lower() in ["nhi-core", "nhi-core-v1.1"]
+        is_local = self._is_local(service_name, service_ip)
         
-        result = {
+        return {
             "service": service_name,
             "ip": service_ip,
             "status": "scanned",
@@ -290,105 +475,128 @@ class DependencyInferrer:
             "inferred_dependencies": [],
             "raw_connections": []
         }
+    
+    def _parse_runtime_connections(self, result: Dict, output: str) -> None:
+        """Fill a scan result from the text of /proc/net/tcp{,6}."""
+        service_ip = result["ip"]
+        # Accumulate into sets: duplicates are dropped as they arrive
+        listening = set()
+        raw_connections = set()
+        dependencies = set()
         
-        try:
-            # Command to get connections (ss -tn shows all TCP connections)
-            cmd_str = "ss -tn 2>/dev/null; echo '---'; ss -tln 2>/dev/null"
+        for state, (local_ip, local_port), (peer_ip, peer_port) in _parse_proc_net_tcp(output):
+            if state == TCP_LISTEN:
+                # Listening ports (what this service exposes)
+                if 0 < local_port < 65536:
+                    listening.add(local_port)
+                continue
+            if state != TCP_ESTABLISHED:
+                continue
             
-            if is_local:
-                # Run locally via shell
-                proc = subprocess.run(
-                    ["bash", "-c", cmd_str],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
+            # Established connections (outbound to external services)
+            # Skip localhost connections
+            if peer_ip.startswith("127.") or peer_ip == "::1":
+                continue
+            # Skip connections to self
+            if peer_ip == service_ip:
+                continue
+            
+            connection = {
+                "peer_ip": peer_ip,
+                "peer_port": peer_port,
+                "service": None
+            }
+            
+            # Identify the service
+            if peer_port in self.KNOWN_PORTS:
+                connection["service"] = self.KNOWN_PORTS[peer_port]
+            elif peer_ip in self.ip_to_service:
+                connection["service"] = self.ip_to_service[peer_ip]
+            
+            result["outbound"].append(connection)
+            raw_connections.add(f"{peer_ip}:{peer_port}")
+            
+            if connection["service"]:
+                dependencies.add(connection["service"])
+        
+        result["listening"] = list(listening)
+        result["raw_connections"] = list(raw_connections)
+        result["inferred_dependencies"] = list(dependencies)
+    
+    def scan_service_runtime(self, service_name: str) -> Dict:
+        """
+        Scan a specific service's runtime connections via SSH.
+        
+        Returns detailed connection info including:
+        - Outbound connections (what this service connects TO)
+        - Listening ports (what ports this service exposes)
+        - Inferred dependencies
+        """
+        result = self._new_runtime_result(service_name)
+        if result["status"] != "scanned":
+            return result
+        
+        try:
+            if result["scan_type"] == "local":
+                # Read the kernel tables directly, no shell needed
+                output = _read_proc_net_tcp()
             else:
                 # Run via SSH
                 proc = subprocess.run(
-                    ["ssh", "-o", "ConnectTimeout=5", "-o", "StrictHostKeyChecking=no",
-                     "-o", "BatchMode=yes", f"ai-agent@{service_ip}", cmd_str],
+                    self._ssh_args(result["ip"], self.PROC_NET_TCP_CMD, *self._SSH_SCAN_OPTS),
                     capture_output=True,
                     text=True,
                     timeout=15
                 )
+                
+                if proc.returncode != 0:
+                    result["error"] = f"SSH failed: {proc.stderr[:100]}"
+                    result["status"] = "ssh_failed"
+                    return result
+                output = proc.stdout
             
-            if proc.returncode != 0 and not is_local:
-                result["error"] = f"SSH failed: {proc.stderr[:100]}"
-                result["status"] = "ssh_failed"
-                return result
-            
-            # Parse output
-            output = proc.stdout
-            parts = output.split('---')
-            established_output = parts[0] if len(parts) > 0 else ""
-            listening_output = parts[1] if len(parts) > 1 else ""
-            
-            # Parse established connections (outbound to external services)
-            for line in established_output.strip().split('\n'):
-                # Look for ESTAB lines, skip header
-                if 'State' in line or 'ESTAB' not in line:
-                    continue
-                cols = line.split()
-                if len(cols) >= 5:
-                    local = cols[3]
-                    peer = cols[4]
-                    
-                    # Extract peer info
-                    if ':' in peer:
-                        peer_ip, peer_port = peer.rsplit(':', 1)
-                        try:
-                            peer_port = int(peer_port)
-                            
-                            # Skip localhost connections
-                            if peer_ip.startswith("127.") or peer_ip == "::1":
-                                continue
-                            # Skip connections to self
-                            if peer_ip == service_ip:
-                                continue
-                            
-                            connection = {
-                                "peer_ip": peer_ip,
-                                "peer_port": peer_port,
-                                "service": None
-                            }
-                            
-                            # Identify the service
-                            if peer_port in self.KNOWN_PORTS:
-                                connection["service"] = self.KNOWN_PORTS[peer_port]
-                            elif peer_ip in self.ip_to_service:
-                                connection["service"] = self.ip_to_service[peer_ip]
-                            
-                            result["outbound"].append(connection)
-                            result["raw_connections"].append(f"{peer_ip}:{peer_port}")
-                            
-                            if connection["service"]:
-                                result["inferred_dependencies"].append(connection["service"])
-                                
-                        except ValueError:
-                            pass
+            self._parse_runtime_connections(result, output)
             
-            # Parse listening ports
-            for line in listening_output.strip().split('\n'):
-                if not line or 'State' in line:
-                    continue
-                cols = line.split()
-                if len(cols) >= 4:
-                    local = cols[3]
-                    if ':' in local:
-                        _, port = local.rsplit(':', 1)
-                        try:
-                            port = int(port)
-                            if port > 0 and port < 65536:
-                                result["listening"].append(port)
-                        except ValueError:
-                            pass
+        except subprocess.TimeoutExpired:
+            result["error"] = "SSH timeout"
+            result["status"] = "timeout"
+        except Exception as e:
+            result["error"] = str(e)
+            result["status"] = "error"
+        
+        return result
+    
+    async def scan_service_runtime_async(self, service_name: str) -> Dict:
+        """Like scan_service_runtime(), without blocking the event loop on SSH."""
+        result = self._new_runtime_result(service_name)
+        if result["status"] != "scanned":
+            return result
+        
+        try:
+            if result["scan_type"] == "local":
+                output = _read_proc_net_tcp()
+            else:
+                proc = await asyncio.create_subprocess_exec(
+                    *self._ssh_args(result["ip"], self.PROC_NET_TCP_CMD, *self._SSH_SCAN_OPTS),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                try:
+                    stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=15)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    raise
+                
+                if proc.returncode != 0:
+                    result["error"] = f"SSH failed: {stderr.decode(errors='replace')[:100]}"
+                    result["status"] = "ssh_failed"
+                    return result
+                output = stdout.decode(errors='replace')
             
-            # Deduplicate
-            result["inferred_dependencies"] = list(set(result["inferred_dependencies"]))
-            result["listening"] = list(set(result["listening"]))
+            self._parse_runtime_connections(result, output)
             
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             result["error"] = "SSH timeout"
             result["status"] = "timeout"
         except Exception as e:
@@ -401,10 +609,20 @@ class DependencyInferrer:
         """
         Scan all services in the infrastructure for runtime dependencies.
         
+        Returns a comprehensive map of real-time connections. Blocking
+        wrapper around scan_all_services_runtime_async(); async callers
+        should await that directly.
+        """
+        return asyncio.run(self.scan_all_services_runtime_async())
+    
+    async def scan_all_services_runtime_async(self, max_concurrent: int = MAX_CONCURRENT_SCANS) -> Dict:
+        """
+        Scan all services concurrently, at most max_concurrent SSH sessions at a time.
+        
         Returns a comprehensive map of real-time connections.
         """
         results = {
-            "scanned_at": subprocess.run(["date", "-Iseconds"], capture_output=True, text=True).stdout.strip(),
+            "scanned_at": datetime.now().astimezone().isoformat(timespec="seconds"),
             "services": [],
             "dependency_matrix": {},
             "summary": {
@@ -417,6 +635,27 @@ class DependencyInferrer:
         
         resources = self.system_map.get("resources", [])
         
+        # SSH scans are latency bound: run them concurrently up front
+        to_scan = list(dict.fromkeys(
+            resource.get("name", "unknown") for resource in resources
+            if resource.get("ip") and resource.get("status") == "running"
+        ))
+        
+        # Services that resolve to the same host share a single SSH scan
+        hosts = {}
+        for name in to_scan:
+            ip = self._find_service_ip(name)
+            key = (ip, self._is_local(name, ip)) if ip else (None, name)
+            hosts.setdefault(key, []).append(name)
+        
+        # The semaphore keeps concurrent handshakes under sshd's MaxStartups
+        semaphore = asyncio.Semaphore(max_concurrent)
+        scans = {}
+        for host_scans in await asyncio.gather(
+            *(self._scan_host_services(names, semaphore) for names in hosts.values())
+        ):
+            scans.update(host_scans)
+        
         for resource in resources:
             name = resource.get("name", "unknown")
             ip = resource.get("ip")
@@ -433,8 +672,7 @@ class DependencyInferrer:
             
             results["summary"]["total_services"] += 1
             
-            # Scan this service
-            scan_result = self.scan_service_runtime(name)
+            scan_result = scans[name]
             results["services"].append(scan_result)
             
             if scan_result.get("status") == "scanned":
@@ -452,3 +690,28 @@ class DependencyInferrer:
         results["summary"]["unique_dependencies"] = list(results["summary"]["unique_dependencies"])
         
         return results
+
+
+@functools.lru_cache(maxsize=1024)
+def _scan_config_file(path: str, mtime_ns: int, size: int) -> Tuple[Tuple[Optional[str], Optional[int]], ...]:
+    """
+    Extract the (host, port) pairs found in one config file.
+    
+    mtime_ns and size only key the cache; an edited file gets a fresh scan.
+    """
+    findings = set()
+    if size == 0:
+        return ()  # mmap refuses empty files
+    try:
+        # Scan the page cache directly: no str decode, no copy of the file
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            if not DependencyInferrer._may_contain_connection(content):
+                return ()
+            
+            # Apply regex patterns
+            for pattern_re in DependencyInferrer._COMPILED_PATTERNS:
+                for match in pattern_re.finditer(content):
+                    findings.add(DependencyInferrer._match_host_port(match))
+    except Exception:
+        pass
+    return tuple(findings)
@@ -8,6 +8,7 @@ import os
 import subprocess
 from datetime import date
 from pathlib import Path
+from string import Template
 from typing import Optional
 
 
@@ -16,17 +17,20 @@ class ProjectScaffolder:
     
     PROJECTS_ROOT = Path("/home/ai-agent/projects")
     
-    MANIFEST_TEMPLATE = '''# {name} - Project Manifest
+    GIT_INIT_SCRIPT = "git init -q && git add . && git commit -q -m 'Initial project scaffold'"
+    
+    # string.Template: parsed once at class load, filled from one shared mapping
+    MANIFEST_TEMPLATE = Template('''# ${name} - Project Manifest
 
-name: {name}
-description: "{description}"
+name: ${name}
+description: "${description}"
 version: "0.1.0"
 status:
   stage: "planning"
-  last_updated: "{created}T00:00:00Z"
+  last_updated: "${created}T00:00:00Z"
 
-type: {project_type}
-created: "{created}"
+type: ${project_type}
+created: "${created}"
 author: "NHI System"
 
 # Where this project is hosted (if deployed)
@@ -38,7 +42,7 @@ registration:
 # Frontend Configuration (if applicable)
 frontend:
   type: "nhi-native"
-  personality: "{personality}"
+  personality: "${personality}"
   framework: "vanilla"
   build_required: false
 
@@ -64,11 +68,11 @@ roadmap:
     - "Initial implementation"
   v1:
     - "Feature expansion"
-'''
+''')
     
-    README_TEMPLATE = '''# {name}
+    README_TEMPLATE = Template('''# ${name}
 
-> {description}
+> ${description}
 
 ## 🚀 Quick Start
 
@@ -86,12 +90,12 @@ roadmap:
 |-------|--------|-------|
 | Planning | ✅ | Manifest created |
 | MVP | 🚧 | In progress |
-'''
+''')
 
-    ARCHITECTURE_TEMPLATE = '''# {name} - Architecture
+    ARCHITECTURE_TEMPLATE = Template('''# ${name} - Architecture
 
 > **Version:** 0.1  
-> **Date:** {created}
+> **Date:** ${created}
 
 ## Overview
 
@@ -104,7 +108,7 @@ TODO: List main components.
 ## Data Flow
 
 TODO: Describe how data flows through the system.
-'''
+''')
     
     def __init__(self, projects_root: Path = None):
         self.projects_root = projects_root or self.PROJECTS_ROOT
@@ -153,28 +157,25 @@ TODO: Describe how data flows through the system.
         for d in dirs:
             d.mkdir(parents=True, exist_ok=True)
         
+        # One substitution mapping shared by all templates
+        mapping = {
+            "name": name,
+            "description": description,
+            "project_type": project_type,
+            "personality": personality,
+            "created": created
+        }
+        
         # Create manifest
-        manifest_content = self.MANIFEST_TEMPLATE.format(
-            name=name,
-            description=description,
-            project_type=project_type,
-            personality=personality,
-            created=created
-        )
+        manifest_content = self.MANIFEST_TEMPLATE.substitute(mapping)
         (project_path / "project_manifest.yaml").write_text(manifest_content)
         
         # Create README
-        readme_content = self.README_TEMPLATE.format(
-            name=name,
-            description=description
-        )
+        readme_content = self.README_TEMPLATE.substitute(mapping)
         (project_path / "docs" / "README.md").write_text(readme_content)
         
         # Create architecture.md
-        arch_content = self.ARCHITECTURE_TEMPLATE.format(
-            name=name,
-            created=created
-        )
+        arch_content = self.ARCHITECTURE_TEMPLATE.substitute(mapping)
         (project_path / "docs" / "architecture.md").write_text(arch_content)
         
         # Create .gitignore
@@ -205,20 +206,9 @@ Thumbs.db
         git_initialized = False
         if init_git:
             try:
+                # init, add and commit in one shell: a single fork instead of three
                 subprocess.run(
-                    ["git", "init"],
-                    cwd=project_path,
-                    capture_output=True,
-                    check=True
-                )
-                subprocess.run(
-                    ["git", "add", "."],
-                    cwd=project_path,
-                    capture_output=True,
-                    check=True
-                )
-                subprocess.run(
-                    ["git", "commit", "-m", "Initial project scaffold"],
+                    ["sh", "-c", self.GIT_INIT_SCRIPT],
                     cwd=project_path,
                     capture_output=True,
                     check=True
@@ -245,14 +235,16 @@ Thumbs.db
     def list_projects(self) -> list:
         """List all projects in projects root."""
         projects = []
-        for item in self.projects_root.iterdir():
-            if item.is_dir() and not item.name.startswith('.'):
-                has_manifest = (item / "project_manifest.yaml").exists()
-                projects.append({
-                    "name": item.name,
-                    "path": str(item),
-                    "has_manifest": has_manifest
-                })
+        # DirEntry.is_dir() uses the type from the directory read, no stat per child
+        with os.scandir(self.projects_root) as entries:
+            for entry in entries:
+                if entry.is_dir() and not entry.name.startswith('.'):
+                    has_manifest = os.path.exists(os.path.join(entry.path, "project_manifest.yaml"))
+                    projects.append({
+                        "name": entry.name,
+                        "path": entry.path,
+                        "has_manifest": has_manifest
+                    })
         return sorted(projects, key=lambda x: x['name'])
     
     def validate_project(self, name: str) -> dict:
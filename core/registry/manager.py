@@ -5,11 +5,144 @@ Manages /var/lib/nhi/registry/services/*.yaml files with schema validation.
 """
 
 import os
+import re
+import copy
 import yaml
 import json
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON decode, falls back to json
+    orjson = None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_yaml(path: str, mtime_ns: int, size: int):
+    """Parse a YAML file once per (path, mtime, size); never hand this object out."""
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_schema_cached(path: str, mtime_ns: int) -> Dict:
+    """Parse a JSON schema once per (path, mtime), shared by every manager instance."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def load_yaml_cached(path, st: Optional[os.stat_result] = None) -> Optional[Dict]:
+    """
+    Load a YAML file, reusing the previous parse while the file is unchanged.
+    
+    Any write bumps the mtime and invalidates the entry. Returns a deep
+    copy, so callers are free to mutate the result. Pass st when the
+    caller already has the file's stat (e.g. from DirEntry.stat()).
+    """
+    if st is None:
+        st = os.stat(path)
+    return copy.deepcopy(_parse_yaml(str(path), st.st_mtime_ns, st.st_size))
+
+
+def write_file_bytes(path, payload: bytes) -> None:
+    """
+    Create/truncate path and write payload with a single os.write.
+    
+    Callers serialize the whole document first, instead of letting the
+    YAML emitter push it through a file object token by token.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(payload)
+        while view:  # os.write may write less than asked
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def deep_merge(base: Dict, updates: Dict) -> None:
+    """
+    Merge updates into base in place, descending into dicts present on both sides.
+    
+    Iterative (explicit stack) rather than recursive: no Python frame per level.
+    """
+    stack = [(base, updates)]
+    while stack:
+        target, changes = stack.pop()
+        for key, value in changes.items():
+            current = target.get(key)
+            if isinstance(value, dict) and isinstance(current, dict):
+                stack.append((current, value))
+            else:
+                target[key] = value
+
+
+def scan_yaml_files(directory) -> List[os.DirEntry]:
+    """
+    List the *.yaml files in a directory, sorted by name.
+    
+    One os.scandir pass: the file type comes from the directory read, and
+    DirEntry.stat() is cached for callers that need it. Hidden files are
+    skipped, as Path.glob("*.yaml") would.
+    """
+    with os.scandir(directory) as entries:
+        return sorted(
+            (entry for entry in entries
+             if entry.name.endswith('.yaml') and not entry.name.startswith('.') and entry.is_file()),
+            key=lambda entry: entry.name
+        )
+
+
+def load_yaml_snapshot(directory, max_workers: int = 8) -> Dict[str, Optional[Dict]]:
+    """
+    Parse every *.yaml file in a directory in one pass.
+    
+    A single scandir, then the files are loaded on a thread pool so the
+    reads overlap; unchanged files come straight from the parse cache.
+    
+    Returns:
+        Dict mapping file stem to parsed data, in file name order
+    """
+    entries = scan_yaml_files(directory)
+    if not entries:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        datas = executor.map(lambda entry: load_yaml_cached(entry.path, entry.stat()), entries)
+        return {entry.name[:-len('.yaml')]: data for entry, data in zip(entries, datas)}
+
+
+def _compile_validator(schema: Dict) -> Callable[[Dict], List[str]]:
+    """
+    Compile a JSON schema once into a function returning the error messages for a document.
+    
+    The jsonschema validator is built once; each call reports every error,
+    prefixed with its path in the document.
+    """
+    from jsonschema.validators import validator_for
+    
+    validator_cls = validator_for(schema)
+    validator_cls.check_schema(schema)
+    validator = validator_cls(schema)
+    
+    def validate(data: Dict) -> List[str]:
+        errors = []
+        for error in validator.iter_errors(data):
+            path = '.'.join(map(str, error.absolute_path))
+            errors.append(f"{path}: {error.message}" if path else error.message)
+        return errors
+    
+    return validate
 
 
 class RegistryManager:
@@ -18,36 +151,60 @@ class RegistryManager:
     REGISTRY_PATH = Path("/var/lib/nhi/registry/services")
     SCHEMA_PATH = Path("/var/lib/nhi/schemas/service.schema.json")
     
+    # Top-level skeleton marker, as written by create_skeleton()
+    SKELETON_MARKER = re.compile(rb'^_status:[ \t]*["\']?skeleton["\']?[ \t]*$', re.MULTILINE)
+    MARKER_SCAN_BYTES = 4096
+    
+    # Comment block written above a skeleton; %s is the UTF-8 service name
+    SKELETON_HEADER = (
+        b"# NHI Service Registry: %s\n"
+        b"# Auto-generated skeleton - PLEASE REVIEW AND UPDATE\n"
+        b"# Fields marked with TODO need your attention\n"
+        b"\n"
+    )
+    
     def __init__(self):
         self.registry_path = self.REGISTRY_PATH
         self.registry_path.mkdir(parents=True, exist_ok=True)
         self._schema = None
+        self._validator = None
     
     @property
     def schema(self) -> Dict:
-        """Load schema lazily."""
-        if self._schema is None and self.SCHEMA_PATH.exists():
-            with open(self.SCHEMA_PATH, 'r') as f:
-                self._schema = json.load(f)
+        """Load schema lazily (parsed once per process while the file is unchanged)."""
+        if self._schema is None:
+            try:
+                st = os.stat(self.SCHEMA_PATH)
+            except FileNotFoundError:
+                return None
+            self._schema = _load_schema_cached(str(self.SCHEMA_PATH), st.st_mtime_ns)
         return self._schema
     
+    @property
+    def validator(self) -> Optional[Callable[[Dict], List[str]]]:
+        """Schema compiled into a validator on first use (None without a schema)."""
+        if self._validator is None and self.schema:
+            self._validator = _compile_validator(self.schema)
+        return self._validator
+    
     def list_services(self) -> List[str]:
         """List all registered service names."""
-        services = []
-        for f in self.registry_path.glob("*.yaml"):
-            services.append(f.stem)
-        return sorted(services)
+        return [entry.name[:-len('.yaml')] for entry in scan_yaml_files(self.registry_path)]
+    
+    def snapshot(self) -> Dict[str, Optional[Dict]]:
+        """Parse the whole registry at once: {service name: data}."""
+        return load_yaml_snapshot(self.registry_path)
     
     def get_service(self, name: str) -> Optional[Dict]:
         """Get service data by name."""
         path = self.registry_path / f"{name}.yaml"
-        if not path.exists():
+        try:
+            return load_yaml_cached(path)
+        except FileNotFoundError:
             return None
-        with open(path, 'r') as f:
-            return yaml.safe_load(f)
     
     def create_skeleton(self, name: str, vmid: int, ip: str = None, 
-                        description: str = None) -> Path:
+                        description: str = None, now: str = None) -> Path:
         """
         Create a skeleton registry entry for a new service.
         
@@ -56,11 +213,13 @@ class RegistryManager:
             vmid: Proxmox VM/LXC ID
             ip: Optional IP address
             description: Optional description
+            now: ISO timestamp for created/updated (default: current time);
+                 batch callers pass one value for the whole batch
             
         Returns:
             Path to created file
         """
-        now = datetime.now().isoformat()
+        now = now or datetime.now().isoformat()
         
         skeleton = {
             "name": name,
@@ -93,15 +252,8 @@ class RegistryManager:
         path = self.registry_path / f"{name}.yaml"
         
         # Add header comment
-        content = f"""# NHI Service Registry: {name}
-# Auto-generated skeleton - PLEASE REVIEW AND UPDATE
-# Fields marked with TODO need your attention
-
-{yaml.dump(skeleton, default_flow_style=False, sort_keys=False)}
-"""
-        
-        with open(path, 'w') as f:
-            f.write(content)
+        body = yaml.dump(skeleton, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
+        write_file_bytes(path, self.SKELETON_HEADER % name.encode('utf-8') + body.encode('utf-8') + b"\n")
         
         return path
     
@@ -112,13 +264,6 @@ class RegistryManager:
             return False
         
         # Deep merge updates
-        def deep_merge(base, updates):
-            for key, value in updates.items():
-                if key in base and isinstance(base[key], dict) and isinstance(value, dict):
-                    deep_merge(base[key], value)
-                else:
-                    base[key] = value
-        
         deep_merge(data, updates)
         data['updated'] = datetime.now().isoformat()
         
@@ -127,8 +272,9 @@ class RegistryManager:
             del data['_status']
         
         path = self.registry_path / f"{name}.yaml"
-        with open(path, 'w') as f:
-            yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+        write_file_bytes(path, yaml.dump(
+            data, Dumper=SafeDumper, default_flow_style=False, sort_keys=False
+        ).encode('utf-8'))
         
         return True
     
@@ -143,16 +289,41 @@ class RegistryManager:
         if data is None:
             return {"valid": False, "errors": [f"Service {name} not found"]}
         
+        return self._validate_data(data, set(self.list_services()))
+    
+    def validate_all(self, snapshot: Optional[Dict[str, Optional[Dict]]] = None) -> Dict[str, Dict]:
+        """
+        Validate every service registry entry in one pass.
+        
+        The schema, validator and registry snapshot are loaded once for the
+        whole batch instead of once per service.
+        
+        Args:
+            snapshot: Result of snapshot() to reuse (taken if omitted)
+        
+        Returns:
+            Dict mapping service name to its validate() result
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        all_services = set(snapshot)
+        
+        return {
+            name: self._validate_data(data or {}, all_services)
+            for name, data in snapshot.items()
+        }
+    
+    def _validate_data(self, data: Dict, all_services: Set[str]) -> Dict:
+        """Validate one parsed entry; all_services are the registered names."""
         result = {"valid": True, "errors": [], "warnings": []}
         
-        # Check required fields from schema
-        schema = self.schema
-        if schema:
-            required = schema.get('required', [])
-            for field in required:
-                if field not in data:
-                    result["valid"] = False
-                    result["errors"].append(f"Missing required field: {field}")
+        # Check against the compiled schema
+        validator = self.validator
+        if validator:
+            errors = validator(data)
+            if errors:
+                result["valid"] = False
+                result["errors"].extend(errors)
         
         # Check for skeleton marker
         if data.get('_status') == 'skeleton':
@@ -160,26 +331,60 @@ class RegistryManager:
         
         # Check dependencies exist
         deps = data.get('dependencies', {})
-        all_services = set(self.list_services())
         for dep in deps.get('required', []) + deps.get('optional', []):
             if dep not in all_services:
                 result["warnings"].append(f"Dependency '{dep}' is not registered")
         
         return result
     
-    def find_skeletons(self) -> List[str]:
-        """Find services that are still skeleton (need review)."""
-        skeletons = []
-        for name in self.list_services():
-            data = self.get_service(name)
-            if data and data.get('_status') == 'skeleton':
-                skeletons.append(name)
-        return skeletons
+    def find_skeletons(self, snapshot: Optional[Dict[str, Optional[Dict]]] = None) -> List[str]:
+        """
+        Find services that are still skeleton (need review).
+        
+        Args:
+            snapshot: Result of snapshot() to check in memory; without one,
+                      each file is byte-scanned for the marker instead of parsed
+        """
+        if snapshot is not None:
+            return [
+                name for name, data in snapshot.items()
+                if data and data.get('_status') == 'skeleton'
+            ]
+        
+        return [
+            entry.name[:-len('.yaml')] for entry in scan_yaml_files(self.registry_path)
+            if self._is_skeleton(Path(entry.path))
+        ]
+    
+    def _is_skeleton(self, path: Path) -> bool:
+        """
+        Check for the skeleton marker with a byte scan of the file's head and tail.
+        
+        Falls back to a full YAML parse only when the scan is inconclusive
+        (a '_status' key in another form, or a large file without the marker).
+        """
+        scan = self.MARKER_SCAN_BYTES
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            complete = size <= 2 * scan
+            if complete:
+                buf = f.read()
+            else:
+                buf = f.read(scan) + b'\n' + os.pread(f.fileno(), scan, size - scan)
+        
+        if self.SKELETON_MARKER.search(buf):
+            return True
+        if complete and b'_status' not in buf:
+            return False
+        
+        data = self.get_service(path.stem)
+        return bool(data) and data.get('_status') == 'skeleton'
     
     def delete_service(self, name: str) -> bool:
         """Delete a service registry entry."""
         path = self.registry_path / f"{name}.yaml"
-        if path.exists():
+        try:
             path.unlink()
             return True
-        return False
+        except FileNotFoundError:
+            return False
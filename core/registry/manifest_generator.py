@@ -5,16 +5,37 @@ Creates YAML manifests for deployed services and maintains the service registry.
 """
 
 import os
+import sys
 import yaml
 import json
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import logging
 
+from .manager import deep_merge, load_yaml_cached, scan_yaml_files, write_file_bytes
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class ServiceRecord:
+    """Index fields of one service manifest."""
+    name: str
+    vmid: Optional[int]
+    ip: Optional[str]
+    type: Optional[str]
+    ports: Tuple[Any, ...]
+    file: str
+    status: str = 'unknown'  # Would be filled by healthcheck
+
+
 class ManifestGenerator:
     """Generates and manages service manifests."""
     
@@ -44,7 +65,8 @@ class ManifestGenerator:
         ports: Optional[List[Dict]] = None,
         dependencies: Optional[Dict] = None,
         mounts: Optional[List[Dict]] = None,
-        description: str = ""
+        description: str = "",
+        now: Optional[str] = None
     ) -> Path:
         """
         Create a service manifest.
@@ -61,11 +83,13 @@ class ManifestGenerator:
             dependencies: Dict with 'required' and 'optional' lists
             mounts: List of mount dicts [{source, target, type}]
             description: Service description
+            now: ISO timestamp for created/updated (default: current time);
+                 batch callers pass one value for the whole batch
             
         Returns:
             Path to created manifest
         """
-        now = datetime.now().isoformat()
+        now = now or datetime.now().isoformat()
         
         manifest = {
             'name': name,
@@ -109,8 +133,7 @@ class ManifestGenerator:
         
         # Save manifest
         manifest_path = self.registry_path / f"{name}.yaml"
-        with open(manifest_path, 'w') as f:
-            yaml.dump(manifest, f, default_flow_style=False, allow_unicode=True)
+        write_file_bytes(manifest_path, self._dump_manifest(manifest))
         
         logger.info(f"Created manifest: {manifest_path}")
         
@@ -132,63 +155,99 @@ class ManifestGenerator:
         if not manifest_path.exists():
             raise FileNotFoundError(f"Manifest not found: {name}")
         
-        with open(manifest_path, 'r') as f:
-            manifest = yaml.safe_load(f)
+        manifest = load_yaml_cached(manifest_path)
         
         # Deep update
-        self._deep_update(manifest, updates)
+        deep_merge(manifest, updates)
         manifest['updated'] = datetime.now().isoformat()
         
-        with open(manifest_path, 'w') as f:
-            yaml.dump(manifest, f, default_flow_style=False, allow_unicode=True)
+        write_file_bytes(manifest_path, self._dump_manifest(manifest))
         
         logger.info(f"Updated manifest: {manifest_path}")
         
         return manifest_path
     
-    def _deep_update(self, base: Dict, updates: Dict):
-        """Recursively update nested dict."""
-        for key, value in updates.items():
-            if isinstance(value, dict) and key in base and isinstance(base[key], dict):
-                self._deep_update(base[key], value)
-            else:
-                base[key] = value
+    @staticmethod
+    def _dump_manifest(manifest: Dict) -> bytes:
+        """Serialize a manifest to one UTF-8 buffer, ready for a single write."""
+        return yaml.dump(
+            manifest, Dumper=SafeDumper, default_flow_style=False, allow_unicode=True
+        ).encode('utf-8')
     
     def get_all_manifests(self) -> List[Dict]:
         """Get all service manifests."""
         manifests = []
         
-        for manifest_file in self.registry_path.glob("*.yaml"):
-            with open(manifest_file, 'r') as f:
-                data = yaml.safe_load(f)
-                data['_file'] = str(manifest_file)
-                manifests.append(data)
+        for entry in scan_yaml_files(self.registry_path):
+            # Unchanged files come from the parse cache
+            data = load_yaml_cached(entry.path, entry.stat())
+            data['_file'] = entry.path
+            manifests.append(data)
         
         return manifests
     
+    def iter_index_entries(self, manifest_files: Optional[List[os.DirEntry]] = None) -> Iterator[ServiceRecord]:
+        """
+        Yield a ServiceRecord for each manifest, in file name order.
+        
+        Files that are empty or not a mapping with a 'name' are skipped
+        with a warning.
+        
+        Args:
+            manifest_files: scan_yaml_files() listing to reuse (scanned if omitted)
+        """
+        if manifest_files is None:
+            manifest_files = scan_yaml_files(self.registry_path)
+        
+        for manifest_file in manifest_files:
+            with open(manifest_file.path, 'rb') as f:
+                m = yaml.load(f, Loader=SafeLoader)
+            if not isinstance(m, dict) or 'name' not in m:
+                logger.warning(f"Skipping {manifest_file.path}: not a service manifest")
+                continue
+            
+            service_type = m.get('type')
+            yield ServiceRecord(
+                name=m['name'],
+                vmid=m.get('vmid'),
+                ip=m.get('network', {}).get('ip'),
+                # 'lxc'/'vm' repeat across records: share one string object
+                type=sys.intern(service_type) if isinstance(service_type, str) else service_type,
+                ports=tuple(p.get('port') for p in m.get('network', {}).get('ports', [])),
+                file=manifest_file.path
+            )
+    
     def generate_registry_index(self) -> Path:
-        """Generate aggregated service registry."""
-        manifests = self.get_all_manifests()
+        """
+        Generate aggregated service registry.
+        
+        Only the index fields of each manifest are kept in memory. Services
+        are listed by name; when two files declare the same name, the one
+        later in file name order wins.
+        """
+        services = {}
+        manifest_count = 0
+        for record in self.iter_index_entries():
+            manifest_count += 1
+            services[record.name] = {
+                'vmid': record.vmid,
+                'ip': record.ip,
+                'type': record.type,
+                'ports': list(record.ports),
+                'status': record.status
+            }
         
         registry = {
             'version': '1.0',
             'generated': datetime.now().isoformat(),
-            'service_count': len(manifests),
-            'services': {}
+            'service_count': manifest_count,
+            'services': services
         }
         
-        for m in manifests:
-            registry['services'][m['name']] = {
-                'vmid': m.get('vmid'),
-                'ip': m.get('network', {}).get('ip'),
-                'type': m.get('type'),
-                'ports': [p.get('port') for p in m.get('network', {}).get('ports', [])],
-                'status': 'unknown'  # Would be filled by healthcheck
-            }
-        
         index_path = self.base_path / "registry" / "service_registry.yaml"
         with open(index_path, 'w') as f:
-            yaml.dump(registry, f, default_flow_style=False, allow_unicode=True)
+            # sort_keys (the default) orders services by name
+            f.write(yaml.dump(registry, Dumper=SafeDumper, default_flow_style=False, allow_unicode=True))
         
         logger.info(f"Generated registry index: {index_path}")
         
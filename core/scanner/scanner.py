@@ -5,15 +5,78 @@ Connects to Proxmox VE API to enumerate VMs, containers, storage, and network.
 """
 
 import os
+import re
+import json
+import hashlib
+import threading
 import yaml
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 from proxmoxer import ProxmoxAPI
+from requests.adapters import HTTPAdapter
 from core.security.sops_manager import SOPSManager
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to a YAML dump
+    orjson = None
+
+# "ip=" field of a Proxmox net config, without the CIDR suffix
+_IP_RE = re.compile(r'(?:^|,)ip=([^,/]+)')
+
+# Token file path -> (mtime_ns, token); spares a SOPS decrypt per scanner
+_TOKEN_CACHE: Dict[str, Tuple[int, str]] = {}
+
+# (host, port, user, token_name, verify_ssl) -> (token digest, ProxmoxAPI) shared
+# by every scanner in the process, so its HTTP session keeps connections (and
+# TLS) alive. Only a digest of the token is kept, to notice rotation.
+_API_CACHE: Dict[Tuple, Tuple[bytes, ProxmoxAPI]] = {}
+_API_CACHE_LOCK = threading.Lock()
+
+
+def _read_token_cached(path: str, read: Callable[[str], Optional[str]]) -> Optional[str]:
+    """
+    Return read(path), reused while the file's mtime is unchanged (None if missing).
+    
+    A None result (e.g. a failed decrypt) is not cached, so the next call retries.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _TOKEN_CACHE.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    
+    token = read(path)
+    if token is not None:
+        _TOKEN_CACHE[path] = (mtime_ns, token)
+    return token
+
 
 class ProxmoxScanner:
     """Client for discovering Proxmox infrastructure."""
     
+    # API kind -> (resource type, default name prefix)
+    GUEST_KINDS = {
+        'qemu': ('vm', 'VM'),
+        'lxc': ('lxc', 'CT'),
+    }
+    
+    # Concurrent Proxmox API requests during a scan
+    MAX_API_WORKERS = 32
+    
+    # cluster/resources fields that describe configuration, not usage
+    FINGERPRINT_RESOURCE_FIELDS = (
+        'id', 'type', 'node', 'status', 'name', 'storage', 'pool',
+        'template', 'hastate', 'maxcpu', 'maxmem', 'maxdisk'
+    )
+    
     def __init__(self, config_path: str = "/var/lib/nhi/config.yaml"):
         """
         Initialize scanner with configuration.
@@ -30,25 +93,33 @@ class ProxmoxScanner:
             raise FileNotFoundError(f"Config not found: {config_path}")
         
         with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=SafeLoader)
     
     def _get_token_secret(self) -> str:
         """Read Proxmox token secret from secure storage."""
         data_path = self.config['paths']['data']
         
-        # Try new v1.1 path first (YAML format)
-        yaml_path = os.path.join(data_path, 'secrets', 'infrastructure', 'proxmox.yaml')
-        if os.path.exists(yaml_path):
-            sops = SOPSManager(data_path=data_path)
-            secrets = sops.decrypt_file(yaml_path)
+        def decrypt(path: str) -> Optional[str]:
+            secrets = SOPSManager(data_path=data_path).decrypt_file(path)
             if secrets and 'proxmox_token' in secrets:
                 return secrets['proxmox_token'].strip()
+            return None
+        
+        def read_plain(path: str) -> str:
+            with open(path, 'r') as f:
+                return f.read().strip()
+        
+        # Try new v1.1 path first (YAML format)
+        yaml_path = os.path.join(data_path, 'secrets', 'infrastructure', 'proxmox.yaml')
+        token = _read_token_cached(yaml_path, decrypt)
+        if token is not None:
+            return token
         
         # Fallback to legacy path (plain text)
         legacy_path = os.path.join(data_path, 'secrets', '.proxmox_token')
-        if os.path.exists(legacy_path):
-            with open(legacy_path, 'r') as f:
-                return f.read().strip()
+        token = _read_token_cached(legacy_path, read_plain)
+        if token is not None:
+            return token
         
         raise FileNotFoundError(
             f"Proxmox token not found. Expected at:\n"
@@ -57,27 +128,74 @@ class ProxmoxScanner:
         )
     
     def _connect(self) -> ProxmoxAPI:
-        """Establish connection to Proxmox API."""
-        proxmox_config = self.config['proxmox']
+        """
+        Establish connection to Proxmox API.
         
-        return ProxmoxAPI(
-            host=proxmox_config['host'],
-            port=proxmox_config.get('port', 8006),
-            user=proxmox_config['token_id'].split('!')[0],
-            token_name=proxmox_config['token_id'].split('!')[1],
-            token_value=self._get_token_secret(),
-            verify_ssl=proxmox_config.get('verify_ssl', False)
+        Scanners with the same endpoint and token share one client, and
+        with it one pooled keep-alive session (requests sessions and their
+        urllib3 pools are safe to use from the scan worker threads).
+        """
+        proxmox_config = self.config['proxmox']
+        user, token_name = proxmox_config['token_id'].split('!')
+        token_value = self._get_token_secret()
+        token_digest = hashlib.blake2b(token_value.encode('utf-8'), digest_size=16).digest()
+        key = (
+            proxmox_config['host'],
+            proxmox_config.get('port', 8006),
+            user,
+            token_name,
+            proxmox_config.get('verify_ssl', False)
         )
+        
+        with _API_CACHE_LOCK:
+            cached = _API_CACHE.get(key)
+            if cached is not None and cached[0] == token_digest:
+                return cached[1]
+            
+            api = ProxmoxAPI(
+                host=proxmox_config['host'],
+                port=proxmox_config.get('port', 8006),
+                user=user,
+                token_name=token_name,
+                token_value=token_value,
+                verify_ssl=proxmox_config.get('verify_ssl', False)
+            )
+            self._mount_pool(api)
+            _API_CACHE[key] = (token_digest, api)
+            return api
+    
+    def _mount_pool(self, api: ProxmoxAPI):
+        """
+        Pool as many connections as scan workers, so concurrent requests
+        do not open (and then drop) extra connections.
+        
+        proxmoxer has no public hook for its requests session; if its
+        internals change, the client keeps requests' default pool.
+        """
+        try:
+            session = api._store['session']
+            session.mount('https://', HTTPAdapter(
+                pool_connections=16, pool_maxsize=self.MAX_API_WORKERS
+            ))
+        except (AttributeError, KeyError, TypeError):
+            pass
     
-    def get_nodes(self) -> List[Dict]:
+    def _list_nodes(self, nodes: Optional[List[Dict]]) -> List[Dict]:
+        """Return the given raw node listing, fetching it only if not supplied."""
+        return self.proxmox.nodes.get() if nodes is None else nodes
+    
+    def get_nodes(self, nodes: Optional[List[Dict]] = None) -> List[Dict]:
         """
         Get all nodes in the Proxmox cluster.
         
+        Args:
+            nodes: Raw nodes.get() listing to reuse (fetched if omitted)
+        
         Returns:
             List of node dictionaries with status info
         """
-        nodes = []
-        for node in self.proxmox.nodes.get():
+        node_list = []
+        for node in self._list_nodes(nodes):
             node_info = {
                 'name': node['node'],
                 'status': node['status'],
@@ -87,79 +205,88 @@ class ProxmoxScanner:
                 'maxmem': node.get('maxmem', 0),
                 'uptime': node.get('uptime', 0)
             }
-            nodes.append(node_info)
-        return nodes
+            node_list.append(node_info)
+        return node_list
     
-    def get_vms_and_containers(self) -> List[Dict]:
+    def get_vms_and_containers(self, nodes: Optional[List[Dict]] = None,
+                               fetch_config: bool = True) -> List[Dict]:
         """
         Get all VMs and LXC containers across all nodes.
         
+        Guest listings and per-guest configs are independent API calls,
+        so they are fetched concurrently: a scan costs a few round-trips
+        instead of one per guest.
+        
+        Args:
+            nodes: Raw nodes.get() listing to reuse (fetched if omitted)
+            fetch_config: Fetch each guest's config (needed for 'ip' and the
+                          'cpu' fallback); False skips one API call per guest
+        
         Returns:
             List of VM/container dictionaries
         """
-        resources = []
+        listings = [
+            (node['node'], kind)
+            for node in self._list_nodes(nodes)
+            for kind in ('qemu', 'lxc')
+        ]
+        if not listings:
+            return []
         
-        for node in self.proxmox.nodes.get():
-            node_name = node['node']
-            
-            # Get QEMUs (VMs)
-            try:
-                for vm in self.proxmox.nodes(node_name).qemu.get():
-                    config = {}
-                    try:
-                        config = self.proxmox.nodes(node_name).qemu(vm['vmid']).config.get()
-                    except Exception:
-                        pass
-                    
-                    resources.append({
-                        'type': 'vm',
-                        'vmid': vm['vmid'],
-                        'name': vm.get('name', f"VM-{vm['vmid']}"),
-                        'node': node_name,
-                        'status': vm['status'],
-                        'cpu': vm.get('cpus', config.get('cores', 0)),
-                        'mem': vm.get('maxmem', 0),
-                        'ip': self._extract_ip(config.get('net0', ''))
-                    })
-            except Exception:
-                pass
-            
-            # Get LXCs (Containers)
-            try:
-                for lxc in self.proxmox.nodes(node_name).lxc.get():
-                    config = {}
-                    try:
-                        config = self.proxmox.nodes(node_name).lxc(lxc['vmid']).config.get()
-                    except Exception:
-                        pass
-                    
-                    resources.append({
-                        'type': 'lxc',
-                        'vmid': lxc['vmid'],
-                        'name': lxc.get('name', f"CT-{lxc['vmid']}"),
-                        'node': node_name,
-                        'status': lxc['status'],
-                        'cpu': lxc.get('cpus', config.get('cores', 0)),
-                        'mem': lxc.get('maxmem', 0),
-                        'ip': self._extract_ip(config.get('net0', ''))
-                    })
-            except Exception:
-                pass
+        with ThreadPoolExecutor(max_workers=self.MAX_API_WORKERS) as executor:
+            guests = [
+                (node_name, kind, guest)
+                for (node_name, kind), node_guests in zip(listings, executor.map(self._list_guests, listings))
+                for guest in node_guests
+            ]
+            if fetch_config:
+                configs = list(executor.map(
+                    self._get_guest_config,
+                    [(node_name, kind, guest['vmid']) for node_name, kind, guest in guests]
+                ))
+            else:
+                configs = [{}] * len(guests)
+        
+        resources = []
+        for (node_name, kind, guest), config in zip(guests, configs):
+            res_type, prefix = self.GUEST_KINDS[kind]
+            resources.append({
+                'type': res_type,
+                'vmid': guest['vmid'],
+                'name': guest.get('name', f"{prefix}-{guest['vmid']}"),
+                'node': node_name,
+                'status': guest['status'],
+                'cpu': guest.get('cpus', config.get('cores', 0)),
+                'mem': guest.get('maxmem', 0),
+                'ip': self._extract_ip(config.get('net0', ''))
+            })
         
         return resources
     
+    def _list_guests(self, listing: Tuple[str, str]) -> List[Dict]:
+        """List a node's guests of one kind ('qemu' or 'lxc'); [] on failure."""
+        node_name, kind = listing
+        try:
+            return getattr(self.proxmox.nodes(node_name), kind).get()
+        except Exception:
+            return []
+    
+    def _get_guest_config(self, key: Tuple[str, str, int]) -> Dict:
+        """Fetch one guest's config; {} on failure."""
+        node_name, kind, vmid = key
+        try:
+            return getattr(self.proxmox.nodes(node_name), kind)(vmid).config.get()
+        except Exception:
+            return {}
+    
     def _extract_ip(self, net_config: str) -> Optional[str]:
         """Extract IP address from Proxmox network config string."""
         if not net_config:
             return None
         
         # Format: "name=eth0,bridge=vmbr0,ip=192.168.1.100/24,..."
-        for part in net_config.split(','):
-            if part.startswith('ip='):
-                ip = part.split('=')[1]
-                # Remove CIDR notation
-                return ip.split('/')[0] if '/' in ip else ip
-        return None
+        match = _IP_RE.search(net_config)
+        return match.group(1) if match else None
     
     def get_storage(self) -> List[Dict]:
         """
@@ -180,10 +307,13 @@ class ProxmoxScanner:
         
         return storage
     
-    def scan_network(self) -> Dict:
+    def scan_network(self, nodes: Optional[List[Dict]] = None) -> Dict:
         """
         Scan network configuration.
         
+        Args:
+            nodes: Raw nodes.get() listing to reuse (fetched if omitted)
+        
         Returns:
             Dictionary with network info
         """
@@ -192,7 +322,7 @@ class ProxmoxScanner:
             'bonds': []
         }
         
-        for node in self.proxmox.nodes.get():
+        for node in self._list_nodes(nodes):
             node_name = node['node']
             
             try:
@@ -222,31 +352,73 @@ class ProxmoxScanner:
         Returns:
             Dictionary with all infrastructure data
         """
+        # One nodes.get() round-trip shared by every section
+        nodes = self.proxmox.nodes.get()
+        
         return {
             'timestamp': __import__('datetime').datetime.now().isoformat(),
-            'nodes': self.get_nodes(),
-            'resources': self.get_vms_and_containers(),
+            'nodes': self.get_nodes(nodes),
+            'resources': self.get_vms_and_containers(nodes),
             'storage': self.get_storage(),
-            'network': self.scan_network()
+            'network': self.scan_network(nodes)
         }
     
+    def fingerprint(self) -> str:
+        """
+        Cheap digest of the cluster state, for deciding whether a full scan
+        is due.
+        
+        Built from the guest listings (no per-guest config calls) and one
+        cluster/resources call for nodes, storage and pools. Usage counters
+        are left out, so an idle cluster keeps a stable fingerprint. Guest
+        IPs and network config are not covered: a change there is only
+        picked up by a full scan.
+        
+        Returns:
+            blake2b hex digest of the listed state
+        """
+        nodes = self.proxmox.nodes.get()
+        guests = self.get_vms_and_containers(nodes, fetch_config=False)
+        resources = [
+            {k: res[k] for k in self.FINGERPRINT_RESOURCE_FIELDS if k in res}
+            for res in self.proxmox.cluster.resources.get()
+        ]
+        
+        state = {
+            'nodes': sorted((n['node'], n['status']) for n in nodes),
+            'guests': sorted(guests, key=lambda g: g['vmid']),
+            'resources': sorted(resources, key=lambda r: r.get('id', ''))
+        }
+        payload = json.dumps(state, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+    
     def save_infrastructure(self, output_path: str = "/var/lib/nhi/infrastructure.yaml"):
         """
         Scan and save infrastructure to YAML file.
         
+        With orjson installed the file is written as JSON, which is valid
+        YAML: YAML readers keep working, and JSON-aware readers parse it
+        with orjson instead of a YAML parser.
+        
         Args:
             output_path: Where to save the infrastructure data
         """
         data = self.scan_all()
         
-        with open(output_path, 'w') as f:
-            yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+            with open(output_path, 'wb') as f:
+                f.write(payload + b'\n')
+        else:
+            with open(output_path, 'w') as f:
+                yaml.dump(data, f, Dumper=SafeDumper, default_flow_style=False, allow_unicode=True)
         
         return output_path
     
     def _find_resource(self, vmid: int) -> Optional[Dict]:
         """Find a resource by VMID and return its type and node."""
-        resources = self.get_vms_and_containers()
+        # Only type and node are needed: skip the per-guest config calls
+        resources = self.get_vms_and_containers(fetch_config=False)
         for r in resources:
             if r['vmid'] == vmid:
                 return r
@@ -8,17 +8,61 @@ Manages 3-level key hierarchy:
 """
 
 import os
+import functools
 import subprocess
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+def _write_file_atomic(path: Path, data: bytes, mode: int = 0o644):
+    """
+    Publish data at path so readers see the old file or the complete new one.
+    
+    The content is written and fsynced in an unnamed O_TMPFILE inode, given
+    a name only once complete, and renamed over path. Filesystems without
+    O_TMPFILE (or without /proc) fall back to a named temp file + rename.
+    """
+    tmp_path = path.parent / f".{path.name}.{os.getpid()}.tmp"
+    
+    try:
+        fd = os.open(path.parent, os.O_TMPFILE | os.O_WRONLY, mode)
+    except (AttributeError, OSError):
+        fd = None
+    
+    if fd is not None:
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+            os.link(f"/proc/self/fd/{fd}", tmp_path)
+            linked = True
+        except OSError:
+            linked = False
+        finally:
+            os.close(fd)
+        if linked:
+            os.replace(tmp_path, path)
+            return
+    
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", delete=False) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(f.name, mode)
+    os.replace(f.name, path)
+
+
 class AgeKeyManager:
     """Manages Age encryption keys for SOPS integration."""
     
+    PUBLIC_KEY_PREFIX = "# public key: "
+    
+    __slots__ = ("base_path", "age_path", "sops_config_path")
+    
     def __init__(self, base_path: str = "/var/lib/nhi"):
         self.base_path = Path(base_path)
         self.age_path = self.base_path / "age"
@@ -33,13 +77,13 @@ class AgeKeyManager:
         """
         self.age_path.mkdir(parents=True, exist_ok=True)
         
-        # Generate keys in order
-        master_key, master_pub = self._generate_key("master")
-        host_key, host_pub = self._generate_key("host")
-        services_key, services_pub = self._generate_key("services")
+        # Keys are independent (one file each): generate them concurrently
+        names = ("master", "host", "services")
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            keys = dict(zip(names, executor.map(self._generate_key, names)))
         
         # Create SOPS config
-        self._create_sops_config(master_pub, host_pub, services_pub)
+        self._create_sops_config(keys["master"][1], keys["host"][1], keys["services"][1])
         
         return True
     
@@ -60,9 +104,10 @@ class AgeKeyManager:
             public_key = self._get_public_key(private_key_path)
             return private_key_path, public_key
         
-        # Generate new key
+        # Generate new key: one age-keygen run prints the key file
+        # (including a "# public key:" line) to stdout
         result = subprocess.run(
-            ["age-keygen", "-o", str(private_key_path)],
+            ["age-keygen"],
             capture_output=True,
             text=True
         )
@@ -70,16 +115,26 @@ class AgeKeyManager:
         if result.returncode != 0:
             raise RuntimeError(f"Failed to generate {name} key: {result.stderr}")
         
-        # Set secure permissions
-        os.chmod(private_key_path, 0o600)
+        public_key = next(
+            (line[len(self.PUBLIC_KEY_PREFIX):].strip() for line in result.stdout.splitlines()
+             if line.startswith(self.PUBLIC_KEY_PREFIX)),
+            None
+        )
+        if not public_key:
+            raise RuntimeError(f"Failed to generate {name} key: no public key in age-keygen output")
         
-        # Extract public key
-        public_key = self._get_public_key(private_key_path)
+        # Created with secure permissions, never over an existing key
+        fd = os.open(private_key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            view = memoryview(result.stdout.encode())
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
         
         # Save public key separately
         pub_key_path = self.age_path / f"{name}.key.pub"
-        with open(pub_key_path, 'w') as f:
-            f.write(public_key + "\n")
+        pub_key_path.write_text(public_key + "\n", encoding="utf-8")
         
         logger.info(f"Generated {name} key: {public_key[:20]}...")
         
@@ -123,8 +178,14 @@ creation_rules:
       {services_pub}
 """
         
-        with open(self.sops_config_path, 'w') as f:
-            f.write(config)
+        # Re-runs produce the same config: leave the file (and its mtime) alone
+        if self.sops_config_path.exists() and \
+                self.sops_config_path.read_text(encoding="utf-8") == config:
+            logger.info(f"SOPS config unchanged at {self.sops_config_path}")
+            return
+        
+        # Atomic: a crash mid-write must not leave a truncated config behind
+        _write_file_atomic(self.sops_config_path, config.encode("utf-8"))
         
         logger.info(f"Created SOPS config at {self.sops_config_path}")
     
@@ -140,8 +201,7 @@ creation_rules:
         if not master_key_path.exists():
             return None
         
-        with open(master_key_path, 'r') as f:
-            return f.read()
+        return master_key_path.read_text(encoding="utf-8")
     
     def verify_backup_confirmation(self, user_input: str) -> bool:
         """
@@ -156,13 +216,15 @@ creation_rules:
         return user_input.strip() == "I HAVE SAVED THE KEY"
 
 
+@functools.lru_cache(maxsize=1)
 def check_age_installed() -> bool:
-    """Check if age is installed on the system."""
+    """Check if age is installed on the system (probed once per process)."""
     try:
+        # Only the exit status matters: discard output, no capture or decode
         result = subprocess.run(
             ["age", "--version"],
-            capture_output=True,
-            text=True
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
         )
         return result.returncode == 0
     except FileNotFoundError:
@@ -182,21 +244,26 @@ def install_age():
     
     if result.returncode == 0:
         logger.info("Age installed via apt")
+        check_age_installed.cache_clear()
         return True
     
     # Fallback: download binary
+    import shutil
     import urllib.request
-    import zipfile
     import tempfile
     
     AGE_VERSION = "1.1.1"
     AGE_URL = f"https://github.com/FiloSottile/age/releases/download/v{AGE_VERSION}/age-v{AGE_VERSION}-linux-amd64.tar.gz"
     
     with tempfile.TemporaryDirectory() as tmpdir:
-        archive_path = os.path.join(tmpdir, "age.tar.gz")
-        urllib.request.urlretrieve(AGE_URL, archive_path)
-        
-        subprocess.run(["tar", "-xzf", archive_path, "-C", tmpdir], check=True)
+        # Pipe the download straight into tar: extraction overlaps the
+        # transfer and no archive is written to disk
+        with urllib.request.urlopen(AGE_URL) as response, \
+                subprocess.Popen(["tar", "-xz", "-C", tmpdir], stdin=subprocess.PIPE) as tar:
+            shutil.copyfileobj(response, tar.stdin, 1 << 20)
+            tar.stdin.close()
+        if tar.returncode != 0:
+            raise subprocess.CalledProcessError(tar.returncode, tar.args)
         
         # Copy binaries
         for binary in ["age", "age-keygen"]:
@@ -206,4 +273,5 @@ def install_age():
             os.chmod(dst, 0o755)
     
     logger.info("Age installed from GitHub releases")
+    check_age_installed.cache_clear()
     return True
@@ -5,14 +5,31 @@ Handles encryption/decryption of secrets using SOPS with GPG backend.
 """
 
 import os
+import shutil
+import json
+import functools
 import subprocess
 import yaml
+from pathlib import Path
 from typing import Dict, Optional
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+
+
+@functools.lru_cache(maxsize=1)
+def _find_sops() -> Optional[str]:
+    """Locate the sops binary once per process (PATH lookup, no fork)."""
+    return shutil.which('sops')
+
 
 class SOPSManager:
     """Manages encrypted secrets using SOPS."""
     
+    __slots__ = ("data_path", "secrets_path", "sops_config")
+    
     def __init__(self, data_path: str = "/var/lib/nhi"):
         """
         Initialize SOPS manager.
@@ -35,11 +52,7 @@ class SOPSManager:
     
     def _check_sops(self) -> bool:
         """Check if SOPS is available."""
-        try:
-            subprocess.run(['sops', '--version'], capture_output=True, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        return _find_sops() is not None
     
     def encrypt_file(self, input_path: str, output_path: str = None) -> str:
         """
@@ -90,7 +103,7 @@ class SOPSManager:
         if "ENC[AES256_GCM" in output:
             raise RuntimeError("SOPS decryption failed (returned encrypted content)")
             
-        return yaml.safe_load(output)
+        return yaml.load(output, Loader=SafeLoader)
     
     def get_secret(self, key: str, file: str = "secrets.yaml") -> Optional[str]:
         """
@@ -124,28 +137,28 @@ class SOPSManager:
             file: Secrets file name
         """
         secrets_file = os.path.join(self.secrets_path, file)
-        temp_file = os.path.join(self.secrets_path, f".{file}.tmp")
         
-        # Load existing or create new
-        secrets = {}
+        if not self._check_sops():
+            raise RuntimeError("SOPS not installed")
+        
         if os.path.exists(secrets_file):
+            # Edit the one key in place: no decrypt/re-encrypt round trip
+            # through Python, and a single sops run
+            subprocess.run([
+                'sops', '--config', self.sops_config,
+                '--set', f"{json.dumps([key])} {json.dumps(value)}",
+                secrets_file
+            ], check=True)
+        else:
+            # New file: encrypt a one-key document
+            temp_file = os.path.join(self.secrets_path, f".{file}.tmp")
+            Path(temp_file).write_text(
+                yaml.dump({key: value}, Dumper=SafeDumper), encoding="utf-8"
+            )
             try:
-                secrets = self.decrypt_file(secrets_file)
-            except Exception:
-                pass
-        
-        # Update secret
-        secrets[key] = value
-        
-        # Write temp file
-        with open(temp_file, 'w') as f:
-            yaml.dump(secrets, f)
-        
-        # Encrypt in place
-        self.encrypt_file(temp_file, secrets_file)
-        
-        # Cleanup
-        os.remove(temp_file)
+                self.encrypt_file(temp_file, secrets_file)
+            finally:
+                os.remove(temp_file)
     
     def list_secrets(self, file: str = "secrets.yaml") -> list:
         """
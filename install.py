@@ -20,6 +20,29 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def deploy_tree(src: str, dest: str):
+    """
+    Replace dest with a copy of src without a window where dest is missing.
+    
+    The new tree is copied next to dest and swapped in with renames. Files
+    are copied, not hardlinked, so editing a deployed file never changes
+    the checkout it came from (or the reverse). The old tree is removed
+    once the new one is in place.
+    """
+    staging, old = f"{dest}.new", f"{dest}.old"
+    for leftover in (staging, old):
+        if os.path.exists(leftover):
+            shutil.rmtree(leftover)
+    
+    shutil.copytree(src, staging)
+    if os.path.exists(dest):
+        os.rename(dest, old)
+    os.rename(staging, dest)
+    
+    if os.path.exists(old):
+        shutil.rmtree(old)
+
+
 def run_install(skip_scan: bool = False):
     """
     Run post-genesis installation.
@@ -55,30 +78,13 @@ def run_install(skip_scan: bool = False):
     logger.info(f"Created: {paths['cursorrules']}")
     logger.info(f"Created: {paths['system_map']}")
     
-    logger.info(f"Created: {paths['system_map']}")
-
-    # Step 3: Deploy Design System (New in v1.1)
-    logger.info("Deploying NHI Design System (v1.1)...")
-    ds_src = os.path.join(os.path.dirname(__file__), 'templates', 'design-system')
-    ds_dest = '/var/lib/nhi/design-system'
-    
-    if os.path.exists(ds_src):
-        if os.path.exists(ds_dest):
-            shutil.rmtree(ds_dest)
-        shutil.copytree(ds_src, ds_dest)
-        logger.info(f"Deployed Design System to {ds_dest}")
-    else:
-        logger.warning(f"Design System templates not found at {ds_src}")
-    
     # Step 3: Deploy Design System (New in v1.1)
     logger.info("Deploying NHI Design System (v1.1)...")
     ds_src = os.path.join(os.path.dirname(__file__), 'templates', 'design-system')
     ds_dest = '/var/lib/nhi/design-system'
     
     if os.path.exists(ds_src):
-        if os.path.exists(ds_dest):
-            shutil.rmtree(ds_dest)
-        shutil.copytree(ds_src, ds_dest)
+        deploy_tree(ds_src, ds_dest)
         logger.info(f"Deployed Design System to {ds_dest}")
     else:
         logger.warning(f"Design System templates not found at {ds_src}")
@@ -12,26 +12,64 @@ Usage:
     python3 setup_ssh_access.py --vmid 101  # Single container
 """
 
+import os
 import sys
+import asyncio
 import json
+import shlex
+import shutil
+import socket
 import subprocess
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON decode, falls back to json
+    orjson = None
+
 sys.path.insert(0, "/home/ai-agent/nhi-core-code")
 
 SYSTEM_MAP_PATH = Path("/var/lib/nhi/context/system-map.json")
 SSH_PUB_KEY_PATH = Path("/home/ai-agent/.ssh/id_ed25519.pub")
 PROXMOX_NODE = "192.168.1.2"  # IP is safer than hostname
+MAX_WORKERS = 32  # Containers probed concurrently
+# Every fix logs into PROXMOX_NODE; stay well under sshd's MaxStartups (10:30:100)
+MAX_FIX_WORKERS = 8
+TCP_PROBE_TIMEOUT = 0.5  # Seconds; port 22 must answer before ssh is tried
+SSH_MUX_OPTS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%r@%h:%p",
+    "-o", "ControlPersist=60",
+]
+
+
+
+def tcp_alive(ip: str, port: int = 22, timeout: float = TCP_PROBE_TIMEOUT) -> bool:
+    """Check that something accepts TCP connections on ip:port."""
+    try:
+        with socket.create_connection((ip, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
 
+def ssh_probe_args(ip: str) -> list:
+    """argv of the non-interactive ssh login used to verify access."""
+    return ["ssh", "-o", "ConnectTimeout=3", "-o", "StrictHostKeyChecking=no",
+            "-o", "BatchMode=yes", f"ai-agent@{ip}", "echo OK"]
 
 
 def test_ssh(ip: str) -> bool:
     """Test if SSH works to this IP."""
+    # Unreachable hosts fail in milliseconds instead of ssh's ConnectTimeout
+    if not tcp_alive(ip):
+        return False
+    
     try:
         result = subprocess.run(
-            ["ssh", "-o", "ConnectTimeout=3", "-o", "StrictHostKeyChecking=no",
-             "-o", "BatchMode=yes", f"ai-agent@{ip}", "echo OK"],
+            ssh_probe_args(ip),
             capture_output=True,
             text=True,
             timeout=10
@@ -41,9 +79,57 @@ def test_ssh(ip: str) -> bool:
         return False
 
 
+async def tcp_alive_async(ip: str, port: int = 22, timeout: float = TCP_PROBE_TIMEOUT) -> bool:
+    """Event-loop version of tcp_alive()."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+async def test_ssh_async(ip: str, semaphore: asyncio.Semaphore) -> bool:
+    """Event-loop version of test_ssh(); the semaphore bounds concurrent ssh logins."""
+    if not await tcp_alive_async(ip):
+        return False
+    
+    async with semaphore:
+        proc = await asyncio.create_subprocess_exec(
+            *ssh_probe_args(ip),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            return await asyncio.wait_for(proc.wait(), timeout=10) == 0
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return False
+
+
+async def test_ssh_all(ips: list) -> list:
+    """
+    Probe every IP from one event loop: all TCP connects are in flight at
+    once, and at most MAX_WORKERS ssh logins run at a time.
+    """
+    semaphore = asyncio.Semaphore(MAX_WORKERS)
+    return await asyncio.gather(*(test_ssh_async(ip, semaphore) for ip in ips))
 
-def setup_via_pct(vmid: int, pub_key: str, password: str = None) -> bool:
-    """Setup ai-agent user and SSH via pct exec."""
+
+def setup_via_pct(vmid: int, pub_key: str, password: str = None, messages: list = None) -> bool:
+    """
+    Setup ai-agent user and SSH via pct exec.
+    
+    Warnings and errors are printed, or appended to messages when given
+    (callers running in worker threads print them later, in order).
+    """
+    def report(line: str):
+        if messages is None:
+            print(line)
+        else:
+            messages.append(line)
+    
     commands = [
         "id ai-agent || useradd -m -s /bin/bash ai-agent",
         "mkdir -p /home/ai-agent/.ssh",
@@ -55,33 +141,57 @@ def setup_via_pct(vmid: int, pub_key: str, password: str = None) -> bool:
         "echo 'ai-agent ALL=(ALL) NOPASSWD:ALL' > /etc/sudoers.d/ai-agent && chmod 440 /etc/sudoers.d/ai-agent"
     ]
     
-    for cmd in commands:
-        try:
-            if password:
-                # Use sshpass with password
-                # Note: requires sshpass installed (sudo apt install sshpass)
-                full_cmd = f"sshpass -p '{password}' ssh -o StrictHostKeyChecking=no root@{PROXMOX_NODE} 'pct exec {vmid} -- bash -c \"{cmd}\"'"
-            else:
-                # Use key-based auth
-                full_cmd = f"ssh root@{PROXMOX_NODE} 'pct exec {vmid} -- bash -c \"{cmd}\"'"
-                
-            result = subprocess.run(
-                full_cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=15
-            )
-            if result.returncode != 0:
-                print(f"      Warning: {cmd[:40]}... returned {result.returncode}")
-                # Don't fail immediately, some commands might fail harmlessly (e.g. user exists)
-        except Exception as e:
-            print(f"      Error: {e}")
-            return False
+    # One ssh + pct exec runs the whole list: every command still runs if an
+    # earlier one fails, and each failure is echoed back as a warning line
+    script = "\n".join(
+        f"{{ {cmd}\n}} >/dev/null 2>&1 || echo {shlex.quote(cmd[:40] + '...')} returned $?"
+        for cmd in commands
+    )
+    remote_cmd = f"pct exec {vmid} -- bash -c {shlex.quote(script)}"
+    
+    # ControlMaster: containers set up in the same run share one connection
+    ssh_cmd = ["ssh", *SSH_MUX_OPTS, f"root@{PROXMOX_NODE}", remote_cmd]
+    env = None
+    if password:
+        # Use sshpass with password, passed via the environment (not argv)
+        # Note: requires sshpass installed (sudo apt install sshpass)
+        ssh_cmd = ["sshpass", "-e", "ssh", "-o", "StrictHostKeyChecking=no", *ssh_cmd[1:]]
+        env = {**os.environ, "SSHPASS": password}
+    
+    try:
+        result = subprocess.run(
+            ssh_cmd,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60
+        )
+    except Exception as e:
+        report(f"      Error: {e}")
+        return False
+    
+    # Don't fail on these, some commands might fail harmlessly (e.g. user exists)
+    for line in result.stdout.splitlines():
+        report(f"      Warning: {line}")
+    if result.returncode != 0:
+        report(f"      Warning: ssh to {PROXMOX_NODE} returned {result.returncode}")
     
     return True
 
 
+def fix_container(vmid: int, ip: str, pub_key: str, password: str = None) -> tuple:
+    """
+    Setup via pct exec, then re-test SSH.
+    
+    Returns:
+        ('fixed' | 'failed' | 'setup_failed', warning lines from the setup)
+    """
+    messages = []
+    if not setup_via_pct(vmid, pub_key, password, messages):
+        return "setup_failed", messages
+    return ("fixed" if test_ssh(ip) else "failed"), messages
+
+
 def main(target_vmid: int = None, password: str = None):
     print("=" * 60)
     print("NHI SSH Access Setup")
@@ -92,8 +202,8 @@ def main(target_vmid: int = None, password: str = None):
         print("ERROR: system-map.json not found!")
         return
     
-    with open(SYSTEM_MAP_PATH) as f:
-        data = json.load(f)
+    raw = SYSTEM_MAP_PATH.read_bytes()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
     
     resources = data.get("resources", [])
     
@@ -109,13 +219,16 @@ def main(target_vmid: int = None, password: str = None):
     if password:
         print("Using provided password for Proxmox root access")
         # Check if sshpass is installed
-        if subprocess.run("which sshpass", shell=True).returncode != 0:
+        if shutil.which("sshpass") is None:
             print("Installing sshpass...")
-            subprocess.run("sudo apt update && sudo apt install -y sshpass", shell=True)
+            if subprocess.run(["sudo", "apt", "update"]).returncode == 0:
+                subprocess.run(["sudo", "apt", "install", "-y", "sshpass"])
     
     # Process each container
     results = {"ok": [], "fixed": [], "failed": [], "skipped": []}
     
+    targets = []
+    
     for res in resources:
         vmid = res.get("vmid")
         name = res.get("name")
@@ -127,48 +240,61 @@ def main(target_vmid: int = None, password: str = None):
         if target_vmid and vmid != target_vmid:
             continue
         
-        print(f"\n[{vmid}] {name} ({ip})")
-        
         # Skip VMs (only LXC via pct)
         if res_type == "qemu":
-            print("  → Skipping (VM, not LXC)")
-            results["skipped"].append(name)
-            continue
-        
+            reason = "VM, not LXC"
         # Skip stopped containers
-        if status != "running":
-            print("  → Skipping (not running)")
-            results["skipped"].append(name)
-            continue
-        
+        elif status != "running":
+            reason = "not running"
         # Skip if no IP
-        if not ip:
-            print("  → Skipping (no IP)")
-            results["skipped"].append(name)
+        elif not ip:
+            reason = "no IP"
+        else:
+            targets.append((vmid, name, ip))
             continue
         
-        # Test SSH
+        print(f"\n[{vmid}] {name} ({ip})")
+        print(f"  → Skipping ({reason})")
+        results["skipped"].append(name)
+    
+    # Probes and fixes are independent and I/O-bound: run them concurrently,
+    # then report in system-map order
+    print(f"\nTesting SSH on {len(targets)} containers...")
+    ssh_ok = dict(zip(targets, asyncio.run(test_ssh_all([t[2] for t in targets]))))
+    
+    with ThreadPoolExecutor(max_workers=MAX_FIX_WORKERS) as executor:
+        broken = [t for t in targets if not ssh_ok[t]]
+        fixes = dict(zip(broken, executor.map(
+            lambda t: fix_container(t[0], t[2], pub_key, password), broken
+        )))
+    
+    for target in targets:
+        vmid, name, ip = target
+        print(f"\n[{vmid}] {name} ({ip})")
+        
         print("  → Testing SSH...", end=" ")
-        if test_ssh(ip):
+        if ssh_ok[target]:
             print("✅ Working")
             results["ok"].append(name)
             continue
         
         print("❌ Failed")
         
-        # Try to fix via pct
         print("  → Attempting fix via pct exec...", end=" ")
-        if setup_via_pct(vmid, pub_key, password):
-            # Verify
-            if test_ssh(ip):
-                print("✅ Fixed!")
-                results["fixed"].append(name)
-            else:
-                print("⚠️ Still not working")
-                results["failed"].append(name)
+        outcome, messages = fixes[target]
+        if outcome == "fixed":
+            print("✅ Fixed!")
+            results["fixed"].append(name)
+        elif outcome == "failed":
+            print("⚠️ Still not working")
+            results["failed"].append(name)
         else:
             print("❌ Setup failed")
             results["failed"].append(name)
+        
+        # Setup warnings, collected in the worker thread for this container
+        for line in messages:
+            print(line)
     
     # Summary
     print("\n" + "=" * 60)
@@ -9,11 +9,17 @@ This script:
 4. Updates system-catalog.json
 5. Regenerates .cursorrules
 
-Designed to run via cron hourly.
+Designed to run via cron hourly. Runs that find neither the listed
+Proxmox guests/resources nor the local config, template, registry and
+project files changed since the last sync stop before the full scan;
+pass --force to always run the full pipeline.
 """
 
 import os
 import sys
+import stat
+import shutil
+import hashlib
 
 # Add core to path
 sys.path.insert(0, '/opt/nhi-core')
@@ -21,19 +27,153 @@ sys.path.insert(0, '/opt/nhi-core')
 from datetime import datetime
 from pathlib import Path
 
+# Generated .cursorrules and the copy deployed to the agent's home
+CTX_CURSORRULES = Path("/var/lib/nhi/context/.cursorrules")
+HOME_CURSORRULES = Path("/home/ai-agent/.cursorrules")
 
-def sync_catalog():
-    """Run full catalog synchronization."""
+# Fingerprint of the last fully synced state, plus the cron run counter.
+# Kept outside /var/lib/nhi: that directory is a git repo the updater
+# commits and pushes, and the counter changes on every run.
+FINGERPRINT_PATH = Path("/var/cache/nhi/last_sync_fingerprint")
+FULL_RESYNC_EVERY = 24  # runs; an unchanged system is still fully resynced this often
+
+# Local catalog inputs, fingerprinted by mtime alongside the cluster listing
+CONFIG_PATH = Path("/var/lib/nhi/config.yaml")
+CURSORRULES_TEMPLATE = Path("/opt/nhi-core/core/templates/cursorrules_template.md")
+REGISTRY_DIR = Path("/var/lib/nhi/registry/services")
+PROJECTS_DIR = Path("/home/ai-agent/projects")
+NHI_CORE_MANIFEST = Path("/home/ai-agent/nhi-core-code/project_manifest.yaml")
+
+
+def _file_digest(path: Path) -> bytes:
+    """blake2b digest of a file, read in 64 KiB chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def deploy_file(src: Path, dst: Path) -> bool:
+    """
+    Copy src over dst unless dst already has the same content.
+    
+    Fast path: equal size and mtime (dst's mtime is synced to src's on
+    every deploy). Slow path: equal size and content hash. A real copy
+    goes through a temp file and os.replace, so dst is never half-written;
+    an existing dst keeps its owner and mode.
+    
+    Returns:
+        True if dst was (re)written
+    """
+    src_stat = os.stat(src)
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        dst_stat = None
+    
+    if dst_stat is not None and dst_stat.st_size == src_stat.st_size:
+        if dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            return False
+        if _file_digest(src) == _file_digest(dst):
+            os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+            return False
+    
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    shutil.copyfile(src, tmp)  # data only (sendfile); no mode copy
+    os.utime(tmp, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    if dst_stat is not None:
+        # The replacement is a new inode owned by whoever runs cron: carry
+        # over dst's owner and mode so the agent can still edit its file
+        os.chmod(tmp, stat.S_IMODE(dst_stat.st_mode))
+        try:
+            os.chown(tmp, dst_stat.st_uid, dst_stat.st_gid)
+        except PermissionError:
+            pass  # not root: only root could have changed the owner anyway
+    os.replace(tmp, dst)
+    return True
+
+
+def _mtime(path) -> int:
+    """st_mtime_ns of path, or 0 if it is missing."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _sync_fingerprint(cluster_fingerprint: str) -> str:
+    """
+    Combine the cluster fingerprint with the mtimes of the config,
+    .cursorrules template, registry entries and project manifests the
+    generated files are built from.
+    """
+    state = [cluster_fingerprint] + [
+        f"{path.name}:{_mtime(path)}"
+        for path in (CONFIG_PATH, CURSORRULES_TEMPLATE, NHI_CORE_MANIFEST)
+    ]
+    for root, filename in ((REGISTRY_DIR, None), (PROJECTS_DIR, "project_manifest.yaml")):
+        try:
+            with os.scandir(root) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            path = entry.path if filename is None else os.path.join(entry.path, filename)
+            state.append(f"{entry.name}:{_mtime(path)}")
+    return hashlib.blake2b("\n".join(state).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _read_sync_state():
+    """Return (last fingerprint, run count); (None, 0) if no state is stored."""
+    try:
+        fingerprint, run_count = FINGERPRINT_PATH.read_text().split()
+        return fingerprint, int(run_count)
+    except (OSError, ValueError):
+        return None, 0
+
+
+def _write_sync_state(fingerprint, run_count: int):
+    """Persist the fingerprint and run count for the next run."""
+    FINGERPRINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    FINGERPRINT_PATH.write_text(f"{fingerprint} {run_count}\n")
+
+
+def sync_catalog(force: bool = False):
+    """
+    Run catalog synchronization.
+    
+    The cheap Proxmox listing is fingerprinted first, together with the
+    local source files; when that matches the last synced state the run
+    ends there, before the full scan, except every FULL_RESYNC_EVERY runs
+    (which also picks up IP and network changes the listing can't see).
+    
+    Args:
+        force: Run the full pipeline even if nothing changed
+    """
+    # Only the scanner is needed for the fingerprint check; the rest of the
+    # pipeline is imported once a sync is actually due
     from core.scanner import ProxmoxScanner
+    
+    print(f"[{datetime.now().isoformat()}] Starting NHI Catalog Sync...")
+    
+    # 1. Scan Proxmox infrastructure, unless nothing changed
+    print("  → Checking Proxmox for changes...")
+    scanner = ProxmoxScanner()
+    cluster_fingerprint = scanner.fingerprint()
+    fingerprint = _sync_fingerprint(cluster_fingerprint)
+    last_fingerprint, run_count = _read_sync_state()
+    run_count += 1
+    if not force and fingerprint == last_fingerprint and run_count % FULL_RESYNC_EVERY:
+        _write_sync_state(last_fingerprint, run_count)
+        print("  → No changes since last sync, skipping")
+        return {"success": True, "skipped": True}
+    
     from core.context import ContextGenerator
     from core.registry import RegistryManager
     from core.context.system_map_builder import SystemMapBuilder
     
-    print(f"[{datetime.now().isoformat()}] Starting NHI Catalog Sync...")
-    
-    # 1. Scan Proxmox infrastructure
     print("  → Scanning Proxmox...")
-    scanner = ProxmoxScanner()
     scanner.save_infrastructure()
     
     # 2. Regenerate context files
@@ -49,50 +189,68 @@ def sync_catalog():
     builder = SystemMapBuilder()
     catalog = builder.build_catalog()
     
-    # Find machines without registry
-    new_skeletons = []
-    for machine in catalog['machines']:
-        if machine['files']['registry'] is None:
-            name = machine['name'].lower().replace(' ', '-')
-            vmid = machine['vmid']
-            ip = machine.get('ip')
-            
-            print(f"    - Creating skeleton for: {name} (VMID {vmid})")
-            path = registry.create_skeleton(name, vmid, ip)
-            new_skeletons.append(str(path))
-    
-    # 4. Save updated catalog
+    # Machines without registry, already slugged by the builder. Names that
+    # slug alike would share one file: the first machine claims it, and a
+    # file left by an earlier run is never overwritten.
+    missing = {}
+    for m in catalog['missing_registries']:
+        if not (registry.registry_path / f"{m['name']}.yaml").exists():
+            missing.setdefault(m['name'], (m['name'], m['vmid'], m['ip']))
+    missing = list(missing.values())
+    
+    # A handful of small files: created one after another
+    now = datetime.now().isoformat()  # one timestamp for the whole batch
+    new_skeletons = [
+        str(registry.create_skeleton(name, vmid, ip, now=now))
+        for name, vmid, ip in missing
+    ]
+    
+    # One write for the whole batch, once every skeleton exists
+    if missing:
+        sys.stdout.write("".join(
+            f"    - Created skeleton for: {name} (VMID {vmid}) → {path}\n"
+            for (name, vmid, _), path in zip(missing, new_skeletons)
+        ))
+    
+    # 4. Save updated catalog (rebuilt only if skeletons changed the registry)
     print("  → Saving system catalog...")
-    catalog_path = builder.save_catalog()
+    final_catalog = builder.build_catalog() if new_skeletons else catalog
+    catalog_path = builder.save_catalog(catalog=final_catalog)
     print(f"    - Saved: {catalog_path}")
     
     # 5. Copy .cursorrules to home
     print("  → Deploying .cursorrules...")
-    context_cursorrules = Path("/var/lib/nhi/context/.cursorrules")
-    home_cursorrules = Path("/home/ai-agent/.cursorrules")
-    if context_cursorrules.exists():
-        import shutil
-        shutil.copy(context_cursorrules, home_cursorrules)
-        print(f"    - Copied to: {home_cursorrules}")
-    
-    # Summary
-    final_catalog = builder.build_catalog()
-    print("\n" + "="*50)
-    print("SYNC COMPLETE")
-    print("="*50)
-    print(f"  Machines: {final_catalog['summary']['total_machines']}")
-    print(f"  Services: {final_catalog['summary']['total_services']}")
-    print(f"  Projects: {final_catalog['summary']['total_projects']}")
-    print(f"  Compliance Issues: {final_catalog['summary']['compliance_issues']}")
-    print(f"  Skeletons Pending: {final_catalog['summary']['skeletons_pending']}")
+    if CTX_CURSORRULES.exists():
+        if deploy_file(CTX_CURSORRULES, HOME_CURSORRULES):
+            print(f"    - Copied to: {HOME_CURSORRULES}")
+        else:
+            print(f"    - Unchanged: {HOME_CURSORRULES}")
+    
+    # Summary, emitted as one write
+    summary = final_catalog['summary']
+    lines = [
+        "",
+        "=" * 50,
+        "SYNC COMPLETE",
+        "=" * 50,
+        f"  Machines: {summary['total_machines']}",
+        f"  Services: {summary['total_services']}",
+        f"  Projects: {summary['total_projects']}",
+        f"  Compliance Issues: {summary['compliance_issues']}",
+        f"  Skeletons Pending: {summary['skeletons_pending']}",
+    ]
     if new_skeletons:
-        print(f"  New Skeletons Created: {len(new_skeletons)}")
-        for s in new_skeletons:
-            print(f"    - {s}")
-    print("="*50)
+        lines.append(f"  New Skeletons Created: {len(new_skeletons)}")
+        lines.extend(f"    - {s}" for s in new_skeletons)
+    lines.append("=" * 50)
+    sys.stdout.write("\n".join(lines) + "\n")
+    
+    # Stored after the run, so its own skeleton files don't count as changes
+    _write_sync_state(_sync_fingerprint(cluster_fingerprint), run_count)
     
     return {
         "success": True,
+        "skipped": False,
         "catalog_path": catalog_path,
         "new_skeletons": new_skeletons,
         "summary": final_catalog['summary']
@@ -101,7 +259,7 @@ def sync_catalog():
 
 if __name__ == "__main__":
     try:
-        result = sync_catalog()
+        result = sync_catalog(force="--force" in sys.argv[1:])
         sys.exit(0)
     except Exception as e:
         print(f"ERROR: {e}")
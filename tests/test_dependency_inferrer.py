@@ -0,0 +1,45 @@
+"""Tests for config-file dependency inference."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.inference import dependency_inferrer
+from core.inference.dependency_inferrer import DependencyInferrer
+
+
+class InferFromConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        
+        # No system map: services are inferred from ports only
+        original_path = dependency_inferrer.SYSTEM_MAP_PATH
+        dependency_inferrer.SYSTEM_MAP_PATH = Path(self.tmp.name) / "missing.json"
+        self.addCleanup(setattr, dependency_inferrer, "SYSTEM_MAP_PATH", original_path)
+    
+    def test_env_var_host_with_port_is_also_matched_as_ip_port(self):
+        # POSTGRES_HOST consumes the whole value; the ip:port rule must still
+        # see the same text and report its port
+        project = Path(self.tmp.name) / "project"
+        project.mkdir()
+        (project / ".env").write_text(
+            "POSTGRES_HOST=10.0.0.5:5432\n"
+            "REDIS_URL=redis://10.0.0.6:6379\n"
+        )
+        
+        result = DependencyInferrer().infer_from_config(str(project))
+        
+        self.assertEqual(sorted(result["found_ports"]), [5432, 6379])
+        self.assertEqual(sorted(result["inferred_services"]), ["postgres-lxc", "redis"])
+        self.assertIn("10.0.0.5:5432", result["found_hosts"])
+        self.assertIn("10.0.0.5", result["found_hosts"])
+
+
+if __name__ == "__main__":
+    unittest.main()
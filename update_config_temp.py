@@ -2,14 +2,23 @@
 import yaml
 import os
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+
 CONFIG_PATH = '/var/lib/nhi/config.yaml'
 
 if os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH, 'r') as f:
-        config = yaml.safe_load(f) or {}
+    with open(CONFIG_PATH, 'rb') as f:
+        raw = f.read()
+    
+    # Re-runs: a top-level "backup:" key is found by a byte scan, no YAML parse
+    migrated = raw.startswith(b'backup:') or b'\nbackup:' in raw
+    config = {} if migrated else (yaml.load(raw, Loader=SafeLoader) or {})
     
     changed = False
-    if 'backup' not in config:
+    if not migrated and 'backup' not in config:
         print("Adding backup section...")
         config['backup'] = {
             'enabled': False,
@@ -30,8 +39,11 @@ if os.path.exists(CONFIG_PATH):
         changed = True
     
     if changed:
+        # One-time migration: comments in config.yaml are intentionally not
+        # preserved, so the fast PyYAML C emitter is used instead of a
+        # comment-preserving round-trip
         with open(CONFIG_PATH, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False)
+            yaml.dump(config, f, Dumper=SafeDumper, default_flow_style=False)
         print("Config updated successfully.")
     else:
         print("Config already has backup section.")